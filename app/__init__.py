@@ -32,6 +32,16 @@ def get_prev_function(level: int = 1):
     return code.f_code
 
 
+def get_caller_function(module_prefix: str | tuple[str, ...], frame = None):
+    # first function up the stack (from frame, or the caller) defined in a module whose name starts with module_prefix
+    frame = frame or inspect.currentframe().f_back
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith(module_prefix):
+            return frame.f_code
+        frame = frame.f_back
+    return None
+
+
 def logit(msg: str, level: int = logging.INFO, func = None):
     # Get the previous frame in the stack
     if func is None:
@@ -41,7 +51,8 @@ def logit(msg: str, level: int = logging.INFO, func = None):
     log.log(level=level, msg=msg)
 
 
-def log_traffic(status_code: int, start_time: datetime, method: str, url: str, client: str, level: int = logging.INFO, **kwargs):
+def log_traffic(status_code: int, start_time: datetime, method: str, url: str, client: str, level: int = logging.INFO,
+                db_queries: dict = None, **kwargs):
     process_time = (datetime.now() - start_time).total_seconds()
     log_params = {
         "client": client,
@@ -50,6 +61,11 @@ def log_traffic(status_code: int, start_time: datetime, method: str, url: str, c
         "method": method,
         "url": url,
     }
+    if db_queries is not None:
+        log_params["db_queries"] = db_queries
+        if db_queries["repeated"]:
+            # same statement over and over, probably lazy loads inside a loop (N+1)
+            level = max(level, logging.WARNING)
     logit(str(log_params), level=level, func=get_prev_function())
 
 
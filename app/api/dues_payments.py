@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from starlette import status
 
 from app.api import error_json
-from app.db import crud_dues_payments, schemas, DB_SESSION
+from app.db import crud_dues_payments, schemas, DB_SESSION, READ_DB_SESSION
 from app.sec import GET_CURRENT_API_CLIENT, TokenData, are_valid_scopes
 from app.utils.errors import CustomException
 
@@ -24,7 +24,25 @@ def create_dues_payment_year_month(
     are_valid_scopes(["app:create", "due_payment:create"], current_client)
 
     try:
-        return crud_dues_payments.create_dues_payment_year_month(db=db, dues_payment_create=dues_payment_create)
+        dp = crud_dues_payments.create_dues_payment_year_month(db=db, dues_payment_create=dues_payment_create)
+        return crud_dues_payments.get_due_payment_year_month_stats(db, id_year_month=dp.id_year_month)
+    except CustomException as exc:
+        return error_json(exc)
+
+
+@router.post(
+    path="/range",
+    response_model=List[schemas.DuesPaymentStats],
+    status_code=status.HTTP_201_CREATED
+)
+def create_dues_payment_year_month_range(
+        dues_payment_range: schemas.DuesPaymentRangeCreate,
+        db: Session = DB_SESSION,
+        current_client: TokenData = GET_CURRENT_API_CLIENT):
+    are_valid_scopes(["app:create", "due_payment:create"], current_client)
+
+    try:
+        return crud_dues_payments.create_dues_payment_year_month_range(db=db, dues_payment_range=dues_payment_range)
     except CustomException as exc:
         return error_json(exc)
 
@@ -36,7 +54,7 @@ def create_dues_payment_year_month(
 )
 def list_dues_payment_year_month_stats(
         since: str = None, until: str = None,
-        db: Session = DB_SESSION,
+        db: Session = READ_DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:read", "due_payment:read"], current_client)
     return crud_dues_payments.get_dues_payment_year_month_stats_list(db=db, since=since, until=until)
@@ -22,7 +22,8 @@ def create_category(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "category:create"], current_client)
-    return crud_items.create_category(db=db, category_create=category_create)
+    db_category = crud_items.create_category(db=db, category_create=category_create)
+    return crud_items.get_category(db, category_id=db_category.category_id)
 
 
 @router.get(
@@ -74,7 +75,8 @@ def update_category(
 
     try:
         db_category = crud_items.get_category_by_id(db, category_id=category_id)
-        return crud_items.update_category(db, db_category=db_category, category_update=category_update)
+        crud_items.update_category(db, db_category=db_category, category_update=category_update)
+        return crud_items.get_category(db, category_id=category_id)
     except CustomException as exc:
         return error_json(exc)
 
@@ -92,7 +94,8 @@ def create_item(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "item:create"], current_client)
-    return crud_items.create_item(db=db, item_create=item_create)
+    db_item = crud_items.create_item(db=db, item_create=item_create)
+    return crud_items.get_item(db, item_id=db_item.item_id)
 
 
 @router.get(
@@ -141,7 +144,8 @@ def update_item(
 
     try:
         db_item = crud_items.get_item_by_id(db, item_id=item_id)
-        return crud_items.update_item(db, db_item=db_item, item_update=item_update)
+        crud_items.update_item(db, db_item=db_item, item_update=item_update)
+        return crud_items.get_item(db, item_id=item_id)
     except CustomException as exc:
         return error_json(exc)
 
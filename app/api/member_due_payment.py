@@ -1,3 +1,5 @@
+from typing import List
+
 from fastapi import APIRouter
 from sqlalchemy.orm import Session
 from starlette import status
@@ -27,6 +29,23 @@ def get_member_due_payment(
         return error_json(exc)
 
 
+@router.put(
+    path="/",
+    response_model=List[schemas.MemberDuesPayment],
+    status_code=status.HTTP_200_OK
+)
+def pay_member_dues_payments(
+        mdp_bulk: schemas.MemberDuesPaymentBulkPay,
+        db: Session = DB_SESSION,
+        current_client: TokenData = GET_CURRENT_API_CLIENT):
+    are_valid_scopes(["app:update", "member_due_payment:update"], current_client)
+
+    try:
+        return crud_dues_payments.pay_member_dues_payments(db, mdp_bulk=mdp_bulk)
+    except CustomException as exc:
+        return error_json(exc)
+
+
 @router.put(
     path="/{tid}",
     response_model=schemas.MemberDuesPayment,
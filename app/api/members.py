@@ -1,11 +1,12 @@
 from typing import List
 
 from fastapi import APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette import status
 
 from app.api import error_json
-from app.db import crud_member, schemas, DB_SESSION
+from app.db import crud_member, schemas, DB_SESSION, READ_DB_SESSION, ASYNC_DB_SESSION
 from app.sec import GET_CURRENT_API_CLIENT, TokenData, are_valid_scopes
 from app.utils.errors import CustomException
 
@@ -22,7 +23,21 @@ def create_member(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "member:create"], current_client)
-    return crud_member.create_member(db=db, member_create=member_create)
+    db_member = crud_member.create_member(db=db, member_create=member_create)
+    return crud_member.get_member_view(db, member_id=db_member.member_id)
+
+
+@router.post(
+    path="/bulk",
+    response_model=List[schemas.Member],
+    status_code=status.HTTP_201_CREATED
+)
+def create_members(
+        members_create: List[schemas.MemberCreate],
+        db: Session = DB_SESSION,
+        current_client: TokenData = GET_CURRENT_API_CLIENT):
+    are_valid_scopes(["app:create", "member:create"], current_client)
+    return crud_member.create_members(db=db, members_create=members_create)
 
 
 @router.get(
@@ -32,7 +47,7 @@ def create_member(
 )
 def list_members_donations(
         since: str = None, until: str = None,
-        db: Session = DB_SESSION,
+        db: Session = READ_DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:read", "member_donation:read"], current_client)
     return crud_member.list_member_donations_order_by_pay_date(db, since=since, until=until, just_download=False)
@@ -48,10 +63,10 @@ async def list_members(
         only_due_missing: bool = None,
         only_active_members: bool = None,
         search_text: str = "",
-        db: Session = DB_SESSION,
+        adb: AsyncSession = ASYNC_DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:read", "member:read"], current_client)
-    return crud_member.get_members_list(db, skip=skip, limit=limit, only_due_missing=only_due_missing, only_active_members=only_active_members, search_text=search_text)
+    return await crud_member.get_members_list_async(adb, skip=skip, limit=limit, only_due_missing=only_due_missing, only_active_members=only_active_members, search_text=search_text)
 
 
 @router.get(
@@ -83,7 +98,8 @@ def update_member(
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:update", "member:update"], current_client)
     db_member = crud_member.get_member_by_id(db, member_id=member_id)
-    return crud_member.update_member(db, db_member=db_member, member_update=member_update)
+    crud_member.update_member(db, db_member=db_member, member_update=member_update)
+    return crud_member.get_member_view(db, member_id=member_id)
 
 
 @router.put(
@@ -100,7 +116,8 @@ def update_member_active(
 
     try:
         db_member = crud_member.get_member_by_id(db, member_id=member_id)
-        return crud_member.update_member_active(db, db_member=db_member, member_update=member_update)
+        crud_member.update_member_active(db, db_member=db_member, member_update=member_update)
+        return crud_member.get_member_view(db, member_id=member_id)
     except CustomException as exc:
         return error_json(exc)
 
@@ -119,7 +136,8 @@ def update_member_amount(
 
     try:
         db_member = crud_member.get_member_by_id(db, member_id=member_id)
-        return crud_member.update_member_amount(db, db_member=db_member, member_update=member_update)
+        crud_member.update_member_amount(db, db_member=db_member, member_update=member_update)
+        return crud_member.get_member_view(db, member_id=member_id)
     except CustomException as exc:
         return error_json(exc)
 
@@ -135,4 +153,5 @@ def post_member_donation(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "member_donation:create"], current_client)
-    return crud_member.post_member_donation(db, member_id=member_id, member_donation_create=member_donation_create)
+    crud_member.post_member_donation(db, member_id=member_id, member_donation_create=member_donation_create)
+    return crud_member.get_member_view(db, member_id=member_id)
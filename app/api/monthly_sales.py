@@ -0,0 +1,38 @@
+from typing import List
+
+from fastapi import APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.api import error_json
+from app.db import crud_monthly_sales, schemas, ASYNC_DB_SESSION
+from app.sec import GET_CURRENT_API_CLIENT, TokenData, are_valid_scopes
+from app.utils.errors import CustomException
+
+router = APIRouter()
+
+_READ_SCOPES = {
+    "category": "category:read",
+    "item": "item:read",
+    "seller": "seller:read",
+    "ea": "expense_account:read",
+}
+
+
+@router.get(
+    path="/{kind}",
+    response_model=List[schemas.MonthlySales],
+    status_code=status.HTTP_200_OK
+)
+async def list_monthly_sales(
+        kind: str,
+        entity_id: int = None,
+        since: str = None, until: str = None,
+        adb: AsyncSession = ASYNC_DB_SESSION,
+        current_client: TokenData = GET_CURRENT_API_CLIENT):
+    are_valid_scopes(["app:read", _READ_SCOPES.get(kind, "app:read")], current_client)
+
+    try:
+        return await crud_monthly_sales.get_monthly_sales_list_async(adb, kind, entity_id=entity_id, since=since, until=until)
+    except CustomException as exc:
+        return error_json(exc)
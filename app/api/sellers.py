@@ -22,7 +22,8 @@ def create_expense_account(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "expense_account:create"], current_client)
-    return crud_sellers.create_expense_account(db=db, expense_account_create=expense_account_create)
+    db_expense_account = crud_sellers.create_expense_account(db=db, expense_account_create=expense_account_create)
+    return crud_sellers.get_expense_account(db, ea_id=db_expense_account.ea_id)
 
 
 @router.get(
@@ -74,7 +75,8 @@ def update_expense_account(
 
     try:
         db_expense_account = crud_sellers.get_expense_account_by_id(db, ea_id=ea_id)
-        return crud_sellers.update_expense_account(db, db_expense_account=db_expense_account, expense_account_update=expense_account_update)
+        crud_sellers.update_expense_account(db, db_expense_account=db_expense_account, expense_account_update=expense_account_update)
+        return crud_sellers.get_expense_account(db, ea_id=ea_id)
     except CustomException as exc:
         return error_json(exc)
 
@@ -92,7 +94,8 @@ def create_seller(
         db: Session = DB_SESSION,
         current_client: TokenData = GET_CURRENT_API_CLIENT):
     are_valid_scopes(["app:create", "seller:create"], current_client)
-    return crud_sellers.create_seller(db=db, seller_create=seller_create)
+    db_seller = crud_sellers.create_seller(db=db, seller_create=seller_create)
+    return crud_sellers.get_seller(db, seller_id=db_seller.seller_id)
 
 
 @router.get(
@@ -144,6 +147,7 @@ def update_seller(
 
     try:
         db_seller = crud_sellers.get_seller_by_id(db, seller_id=seller_id)
-        return crud_sellers.update_seller(db, db_seller=db_seller, seller_update=seller_update)
+        crud_sellers.update_seller(db, db_seller=db_seller, seller_update=seller_update)
+        return crud_sellers.get_seller(db, seller_id=seller_id)
     except CustomException as exc:
         return error_json(exc)
@@ -1,16 +1,18 @@
 import pandas as pd
 from dash import dcc, html, Input, Output
-from sqlalchemy import text
 
-from ..db import get_db
+from ..db import SessionLocal
+from ..db.dues_matrix import dues_matrix
 
 
-def get_payments_data():
-    session = next(get_db())
-    query = session.execute(text("SELECT * FROM member_dues_payments"))
-    df = pd.DataFrame(query.fetchall(), columns=query.keys())
-    print(df)
-    return df
+def get_member_payments_data(member_id: int) -> list[dict]:
+    with SessionLocal() as session:
+        return dues_matrix.get(session).get_member_dues(member_id)
+
+
+def get_months_balance() -> pd.Series:
+    with SessionLocal() as session:
+        return dues_matrix.get(session).get_months_amount()
 
 
 def register_callbacks(app):
@@ -19,16 +21,14 @@ def register_callbacks(app):
         Input('user-dropdown', 'value')
     )
     def update_table(member_id):
-        df = get_payments_data()
-        return df[df['member_id'] == member_id].to_dict('records')
+        return get_member_payments_data(member_id)
 
     @app.callback(
         Output('monthly-balance-graph', 'figure'),
         Input('user-dropdown', 'value')
     )
     def update_graph(user_id):
-        df = get_payments_data()
-        balance = df.groupby('id_year_month')['amount'].sum()
+        balance = get_months_balance()
         return {
             'data': [{'x': balance.index.astype(str), 'y': balance.values, 'type': 'bar'}],
             'layout': {'title': 'Monthly Balance'}
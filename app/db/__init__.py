@@ -1 +1,2 @@
-from app.db.database import init_db, get_db, DB_SESSION
+from app.db.database import init_db, close_db, close_async_db, get_db, get_read_db, get_async_db, SessionLocal, \
+    DB_SESSION, READ_DB_SESSION, ASYNC_DB_SESSION
@@ -0,0 +1,53 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from sqlalchemy.orm import Session
+
+from app.db import crud_stats
+
+# results kept per worker, the oldest used ones are dropped above this
+DUES_CACHE_SIZE = int(os.getenv("CDC_DUES_CACHE_SIZE", "16"))
+
+
+class VersionedCache:
+
+    def __init__(self, data_version: str, max_entries: int = DUES_CACHE_SIZE):
+        self.data_version = data_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[tuple, object] = OrderedDict()
+
+    def get(self, db: Session, key: Hashable, compute: Callable[[], object]):
+        # a write to the data bumps its version, so the entries of older versions are never hit again and just age out
+        version = crud_stats.get_data_version(db, self.data_version)
+        _key = (key, version)
+        with self.__lock:
+            if _key in self.__entries:
+                self.hits += 1
+                self.__entries.move_to_end(_key)
+                return self.__entries[_key]
+            self.misses += 1
+
+        value = compute()
+        with self.__lock:
+            self.__entries[_key] = value
+            self.__entries.move_to_end(_key)
+            # don't grow above the limit of entries, remove older
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.misses = 0
+
+
+dues_cache = VersionedCache(crud_stats.DUES_DATA_VERSION)
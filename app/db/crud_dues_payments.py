@@ -1,68 +1,67 @@
 import datetime
 import logging
+import os
 from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import func, and_, case as case_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, case as case_, select, Select, true, false, insert, update, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from starlette.concurrency import run_in_threadpool
 
 from app import logit, NAME
-from app.db import models, schemas
+from app.db import models, schemas, crud_stats
+from app.db.cache import dues_cache
+from app.db.dues_matrix import dues_matrix, DuesMatrix
 from app.utils import get_now, get_today_year_month_str, format_year_month, str2date, save_to_excel_sheets, \
-    DataframeSheet, StreamingResponse
-from app.utils.errors import NotFound404, Conflict409
+    DataframeSheet, StreamingResponse, excel_sheets_to_bytes, excel_file_response
+from app.utils.errors import CustomException, NotFound404, Conflict409
 
+# months one range call can open, each one adds a due for every member
+MAX_DUES_PAYMENT_RANGE = int(os.getenv("CDC_MAX_DUES_PAYMENT_RANGE", "36"))
 
-def get_member_due_payment_missing_stats(db: Session, member_id: int) -> Tuple[List[str], int]:
-    mdp_missing = db.query(models.MemberDuesPayment).filter_by(
-        member_id=member_id, is_member_active=True, is_paid=False
-    ).filter(
-        models.MemberDuesPayment.id_year_month <= get_today_year_month_str()
-    ).order_by(models.MemberDuesPayment.id_year_month).all()
 
-    months_missing = [str(mdp.id_year_month) for mdp in mdp_missing]
-    total_amount_missing = sum([mdp.amount for mdp in mdp_missing])
+def get_member_due_payment_missing_stats(db: Session, member_id: int) -> Tuple[List[str], float]:
+    return dues_matrix.get(db).get_member_missing(member_id, get_today_year_month_str())
 
-    return months_missing, total_amount_missing
 
-
-def _calc_dues_payment_stats(db: Session, dp: models.DuesPayment) -> models.DuesPayment:
-    dp.total_amount_paid, dp.total_members_paid = db.query(
-        func.sum(models.MemberDuesPayment.amount), func.count(models.MemberDuesPayment.amount)
-    ).filter_by(id_year_month=dp.id_year_month, is_paid=True, is_member_active=True).one()
-
-    dp.total_amount_missing, dp.total_members_missing = db.query(
-        func.sum(models.MemberDuesPayment.amount), func.count(models.MemberDuesPayment.amount)
-    ).filter_by(id_year_month=dp.id_year_month, is_paid=False, is_member_active=True).one()
-    return dp
+def _dues_payment_view_options() -> list:
+    return [selectinload(models.DuesPayment.member_due_payment).joinedload(models.MemberDuesPayment.member)]
 
 
 def get_due_payment_year_month_stats(db: Session, id_year_month: str) -> models.DuesPayment:
-    _dp = db.get(models.DuesPayment, id_year_month)
+    _dp = db.get(models.DuesPayment, id_year_month, options=_dues_payment_view_options(), populate_existing=True)
     if _dp is None:
         raise NotFound404(f"Due Payment {id_year_month} not found")
-    return _calc_dues_payment_stats(db, _dp)
+    return _dp
 
 
 def get_dues_payment_year_month_stats_list(
         db: Session,
         since: str = None,
         until: str = None
-) -> List[schemas.DuesPaymentView]:
+) -> List[schemas.DuesPaymentStats]:
+    since = format_year_month(since) if since else None
+    until = format_year_month(until) if until else None
+    return dues_cache.get(db, ("months", since, until), lambda: _get_dues_payment_year_month_stats_list(db, since=since, until=until))
+
+
+def _get_dues_payment_year_month_stats_list(
+        db: Session,
+        since: str = None,
+        until: str = None
+) -> List[schemas.DuesPaymentStats]:
     _dp_list = db.query(models.DuesPayment)
     if since:
-        since = format_year_month(since)
         _dp_list = _dp_list.filter(models.DuesPayment.id_year_month >= since)
     if until:
-        until = format_year_month(until)
         _dp_list = _dp_list.filter(models.DuesPayment.id_year_month <= until)
-    _dp_list = _dp_list.order_by(models.DuesPayment.date_ym).all()
-
-    results = []
-    for _dp in _dp_list:
-        dps = _calc_dues_payment_stats(db, _dp)
-        results.append(dps)
-    return results
+    # the stats are stored in the month, kept up to date by every member due change
+    return [
+        schemas.DuesPaymentStats.model_validate(_dp, from_attributes=True)
+        for _dp in _dp_list.order_by(models.DuesPayment.date_ym).all()
+    ]
 
 
 def create_dues_payment_year_month(
@@ -74,83 +73,140 @@ def create_dues_payment_year_month(
 
     try:
         db.add(db_dues_payment)
-        db.commit()
+        db.flush()
     except:
         db.rollback()
         raise Conflict409(f"Due Payment {dp.date_ym} was already created, no need to create a new one.")
 
-    _make_due_payment_for_active_members(db=db, id_year_month=db_dues_payment.id_year_month, date_ym=db_dues_payment.date_ym)
-    _make_due_payment_for_non_active_members(db=db, id_year_month=db_dues_payment.id_year_month, date_ym=db_dues_payment.date_ym)
-
-    db.refresh(db_dues_payment)
-    _calc_dues_payment_stats(db, db_dues_payment)
-
-    return db_dues_payment
-
-
-def _make_due_payment_for_non_active_members(db: Session, id_year_month: str, date_ym: datetime.date) -> None:
-    _member_list = db.query(models.Member).filter_by(is_active=False).filter(
-        models.Member.start_date <= date_ym
-    ).all()
-    now = get_now()
-    try:
-        for member in _member_list:
-            logit(f"Creating 0.0€ Due Payment for member={member.member_id} for {id_year_month} month.", logging.DEBUG)
-            mdp = models.MemberDuesPayment(
-                member_id=member.member_id,
-                id_year_month=id_year_month,
-                amount=0.0,
-                is_paid=True,
-                is_member_active=False,
-                pay_update_time=now
-            )
-            db.add(mdp)
-        db.commit()
-    except:
-        db.rollback()
-        raise
-
-
-def _make_due_payment_for_active_members(db: Session, id_year_month: str, date_ym: datetime.date) -> None:
-    _member_list = db.query(models.Member).filter_by(is_active=True).filter(
-        models.Member.start_date <= date_ym
-    ).all()
     try:
-        for member in _member_list:
-            _make_due_payment_for_member(db=db, id_year_month=id_year_month, member=member)
+        total_members, total_active = _make_due_payment_for_members(db, [db_dues_payment.id_year_month])
         db.commit()
     except:
         db.rollback()
         raise
+    logit(f"Created Due Payment {db_dues_payment.id_year_month} for {total_members} members, {total_active} active.")
 
-
-def make_due_payment_for_new_member(db: Session, member: models.Member) -> None:
-    _dp_list = db.query(models.DuesPayment).filter(models.DuesPayment.date_ym >= member.start_date).all()
-    try:
-        for _dp in _dp_list:
-            _make_due_payment_for_member(db=db, id_year_month=_dp.id_year_month, member=member)
-        db.commit()
-    except:
-        db.rollback()
-        raise
+    db.refresh(db_dues_payment)
+    return db_dues_payment
 
 
-def _make_due_payment_for_member(db: Session, id_year_month: str, member: models.Member) -> None:
-    logit(f"Creating missing {member.amount}€ Due Payment for member={member.member_id} for {id_year_month} month.", logging.DEBUG)
-    mdp = models.MemberDuesPayment(
-        member_id=member.member_id,
-        id_year_month=id_year_month,
-        amount=member.amount,
-        is_paid=False,
-        is_member_active=True,
-        pay_update_time=get_now()
-    )
-    db.add(mdp)
+def create_dues_payment_year_month_range(
+        db: Session,
+        dues_payment_range: schemas.DuesPaymentRangeCreate
+) -> List[models.DuesPayment]:
+    since, until = schemas.DuesPayment(id_year_month=dues_payment_range.since), schemas.DuesPayment(id_year_month=dues_payment_range.until)
+    if since.date_ym > until.date_ym:
+        raise CustomException(f"Due Payment range {since.id_year_month} to {until.id_year_month} is not valid.")
+    total_months = (until.year - since.year) * 12 + until.month - since.month + 1
+    if total_months > MAX_DUES_PAYMENT_RANGE:
+        raise CustomException(f"Due Payment range {since.id_year_month} to {until.id_year_month} has {total_months} months, "
+                              f"open at most {MAX_DUES_PAYMENT_RANGE} at a time.")
+
+    # the months already created are kept as they are
+    existing = set(db.scalars(select(models.DuesPayment.id_year_month).filter(
+        models.DuesPayment.date_ym.between(since.date_ym, until.date_ym)
+    )))
+    new_dues_payments = [
+        models.DuesPayment(**dp.model_dump()) for dp in _year_month_range(since, until)
+        if dp.id_year_month not in existing
+    ]
 
-    # update member stats
-    member.total_months_missing += 1
-    member.total_amount_missing += member.amount
-    db.add(member)
+    if new_dues_payments:
+        try:
+            db.add_all(new_dues_payments)
+            db.flush()
+        except:
+            db.rollback()
+            raise Conflict409(f"Due Payments between {since.id_year_month} and {until.id_year_month} are being created, try again.")
+
+        try:
+            total_members, total_active = _make_due_payment_for_members(db, [dp.id_year_month for dp in new_dues_payments])
+            db.commit()
+        except:
+            db.rollback()
+            raise
+        logit(f"Created {len(new_dues_payments)} Due Payments from {since.id_year_month} to {until.id_year_month} "
+              f"with {total_members} member dues, for {total_active} active members.")
+
+    return get_dues_payment_year_month_stats_list(db, since=since.id_year_month, until=until.id_year_month)
+
+
+def _year_month_range(since: schemas.DuesPayment, until: schemas.DuesPayment) -> List[schemas.DuesPayment]:
+    year, month = since.year, since.month
+    dp_list = []
+    while (year, month) <= (until.year, until.month):
+        dp_list.append(schemas.DuesPayment(id_year_month=f"{year}-{month:02d}"))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return dp_list
+
+
+def _make_due_payment_for_members(db: Session, id_year_months: List[str] = None, member_ids: List[int] = None) -> Tuple[int, int]:
+    # one INSERT ... SELECT for every member and month since the member's start date (of the months and/or members given)
+    _m, _dp = models.Member, models.DuesPayment
+    if member_ids is None:
+        # new months: the amount for active members, paid 0.0€ for non-active ones
+        _due = (case_((_m.is_active == true(), _m.amount), else_=0.0), _m.is_active == false(), _m.is_active)
+        _update = update(_m).where(_m.is_active == true())
+    else:
+        # new members: their amount is missing for every month, active or not
+        _due = (_m.amount, false(), true())
+        _update = update(_m)
+    _members = select(
+        _m.member_id,
+        _dp.id_year_month,
+        *_due,
+        literal(get_now()),
+    ).join(_dp, _dp.date_ym >= _m.start_date)
+    _months_missing = select(func.count()).filter(_dp.date_ym >= _m.start_date)
+    if id_year_months is not None:
+        _members = _members.filter(_dp.id_year_month.in_(id_year_months))
+        _months_missing = _months_missing.filter(_dp.id_year_month.in_(id_year_months))
+    if member_ids is not None:
+        _members = _members.filter(_m.member_id.in_(member_ids))
+        _update = _update.where(_m.member_id.in_(member_ids))
+
+    total_members = db.execute(insert(models.MemberDuesPayment).from_select(
+        ["member_id", "id_year_month", "amount", "is_paid", "is_member_active", "pay_update_time"], _members
+    )).rowcount
+
+    # and the stats of the members and of the months, also set-based
+    _months_missing = _months_missing.scalar_subquery()
+    total_active = db.execute(_update.where(_months_missing > 0).values(
+        total_months_missing=func.coalesce(_m.total_months_missing, 0) + _months_missing,
+        total_amount_missing=func.coalesce(_m.total_amount_missing, 0) + _m.amount * _months_missing,
+    ).execution_options(synchronize_session=False)).rowcount
+    if id_year_months is not None:
+        crud_stats.recompute_totals(db, models.DuesPayment, id_year_months)
+    else:
+        # the months already have other members' dues, only the new ones are added to their totals
+        _new_dues = (_m.member_id.in_(member_ids), _m.start_date <= _dp.date_ym)
+        _members_missing = select(func.count()).filter(*_new_dues).scalar_subquery()
+        _amount_missing = select(func.coalesce(func.sum(_m.amount), 0.0)).filter(*_new_dues).scalar_subquery()
+        db.execute(update(_dp).where(_members_missing > 0).values(
+            total_members_missing=func.coalesce(_dp.total_members_missing, 0) + _members_missing,
+            total_amount_missing=func.coalesce(_dp.total_amount_missing, 0) + _amount_missing,
+        ).execution_options(synchronize_session=False))
+
+    # the new months and members, and their dues, for the in-memory copies to add
+    _mdp = models.MemberDuesPayment
+    _dues = select(_mdp.member_id, _mdp.id_year_month, _mdp.amount, _mdp.is_paid, _mdp.is_member_active)
+    _new_members = {}
+    if id_year_months is not None:
+        _dues = _dues.filter(_mdp.id_year_month.in_(id_year_months))
+    if member_ids is not None:
+        _dues = _dues.filter(_mdp.member_id.in_(member_ids))
+        _new_members = dict(db.execute(select(_m.member_id, _m.name).filter(_m.member_id.in_(member_ids))).all())
+    crud_stats.add_dues_changes(db, members=_new_members, id_year_months=id_year_months or (),
+                                member_dues=db.execute(_dues).all())
+
+    return total_members, total_active
+
+
+def make_due_payment_for_new_members(db: Session, member_ids: List[int]) -> Tuple[int, int]:
+    # in the caller's transaction, the same few statements however far back the members start
+    total_members, total_with_dues = _make_due_payment_for_members(db, member_ids=member_ids)
+    logit(f"Created {total_members} Due Payments for {total_with_dues} of {len(member_ids)} new members.", logging.DEBUG)
+    return total_members, total_with_dues
 
 
 def get_member_due_payment(db: Session, tid: int) -> models.MemberDuesPayment:
@@ -176,19 +232,21 @@ def pay_member_due_payment(
         raise Conflict409(f"Member={mdp.member_id} is not active for payment at {mdp.id_year_month} MemberDuesPayment={tid}.")
 
     try:
-        mdp.is_paid = True
-        mdp.is_cash = mdpc.is_cash
-        mdp.pay_date = mdpc.pay_date
-        mdp.pay_update_time = get_now()
-        db.add(mdp)
-
-        # update member stats
-        member = db.get(models.Member, mdp.member_id)
-        member.total_months_paid += 1
-        member.total_amount_paid += mdp.amount
-        member.total_months_missing -= 1
-        member.total_amount_missing -= mdp.amount
-        db.add(member)
+        old_state = crud_stats.member_due_state(mdp)
+        # only while still unpaid, a concurrent payment of the same due can't count twice in the stats
+        total_paid = db.execute(update(models.MemberDuesPayment).where(
+            models.MemberDuesPayment.tid == tid, models.MDP_UNPAID_ACTIVE
+        ).values(
+            is_paid=True,
+            is_cash=mdpc.is_cash,
+            pay_date=mdpc.pay_date,
+            pay_update_time=get_now()
+        )).rowcount
+        if total_paid == 0:
+            raise Conflict409(f"MemberDuesPayment={tid} {mdp.id_year_month} was changed meanwhile for member={mdp.member_id}, try again.")
+
+        # update member and month stats
+        crud_stats.change_member_due_totals(db, mdp, old_state)
 
         db.commit()
     except:
@@ -199,45 +257,85 @@ def pay_member_due_payment(
     return mdp
 
 
-def get_df_pivot_table_dues_paid_for_all_members(
+def pay_member_dues_payments(
         db: Session,
-        months: List[str],
-        month_cases: List,
-        is_paid: bool) -> pd.DataFrame:
-    # Construct the query
-    query = db.query(
-        models.Member.member_id,
-        models.Member.name,
-        *month_cases
-    ).filter(and_(
-        models.MemberDuesPayment.is_member_active==True,
-        models.MemberDuesPayment.is_paid==is_paid)
-    ).join(
-        models.MemberDuesPayment
-    ).group_by(
-        models.Member.member_id
+        mdp_bulk: schemas.MemberDuesPaymentBulkPay
+) -> List[models.MemberDuesPayment]:
+    _mdp = models.MemberDuesPayment
+    if mdp_bulk.tids:
+        tids = set(mdp_bulk.tids)
+        _stmt = select(_mdp).filter(_mdp.tid.in_(tids))
+        if mdp_bulk.member_id is not None:
+            _stmt = _stmt.filter(_mdp.member_id == mdp_bulk.member_id)
+        mdp_list = db.scalars(_stmt).all()
+
+        # all of them or none
+        if tids_not_found := tids - {mdp.tid for mdp in mdp_list}:
+            raise NotFound404(f"MemberDuesPayment={sorted(tids_not_found)} not found.")
+        for mdp in mdp_list:
+            if mdp.is_paid:
+                raise Conflict409(f"MemberDuesPayment={mdp.tid} {mdp.id_year_month} was already paid for member={mdp.member_id} and the amount {mdp.amount}€.")
+            if not mdp.is_member_active:
+                raise Conflict409(f"Member={mdp.member_id} is not active for payment at {mdp.id_year_month} MemberDuesPayment={mdp.tid}.")
+    elif mdp_bulk.member_id is not None:
+        # every missing month of the member in the range
+        _stmt = select(_mdp).filter(_mdp.member_id == mdp_bulk.member_id, models.MDP_UNPAID_ACTIVE)
+        if mdp_bulk.since:
+            _stmt = _stmt.filter(_mdp.id_year_month >= format_year_month(mdp_bulk.since))
+        if mdp_bulk.until:
+            _stmt = _stmt.filter(_mdp.id_year_month <= format_year_month(mdp_bulk.until))
+        mdp_list = db.scalars(_stmt).all()
+        if not mdp_list:
+            raise NotFound404(f"No missing Due Payments for member={mdp_bulk.member_id} to pay.")
+        tids = {mdp.tid for mdp in mdp_list}
+    else:
+        raise CustomException("Choose the Due Payments to pay, by tids or by member_id.")
+
+    try:
+        old_states = {mdp.tid: crud_stats.member_due_state(mdp) for mdp in mdp_list}
+        total_paid = db.execute(update(_mdp).where(
+            _mdp.tid.in_(tids), models.MDP_UNPAID_ACTIVE
+        ).values(
+            is_paid=True,
+            is_cash=mdp_bulk.is_cash,
+            pay_date=mdp_bulk.pay_date,
+            pay_update_time=get_now()
+        )).rowcount
+        if total_paid != len(tids):
+            raise Conflict409(f"MemberDuesPayment={sorted(tids)} were changed meanwhile, try again.")
+
+        # update member and month stats, collected and written once per member and month on commit
+        for mdp in mdp_list:
+            crud_stats.change_member_due_totals(db, mdp, old_states[mdp.tid])
+
+        db.commit()
+    except:
+        db.rollback()
+        raise
+    logit(f"Paid {total_paid} Due Payments for member={sorted({mdp.member_id for mdp in mdp_list})}.")
+
+    return db.scalars(select(_mdp).filter(_mdp.tid.in_(tids)).order_by(_mdp.member_id, _mdp.id_year_month)).all()
+
+
+def get_df_pivot_table_dues_paid_for_all_members(
+        matrix: DuesMatrix,
+        months: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    members, has_paid, has_missing, paid, missing = matrix.get_pivot(months)
+    return (
+        _df_pivot_table(members, has_paid, months, paid),
+        _df_pivot_table(members, has_missing, months, 0.0 - missing),
     )
 
-    results = query.all()
-    if results:
-        # Convert results to a DataFrame
-        multiplier = 1 if is_paid else -1
-        data = [
-            {id_year_month: getattr(row, id_year_month) * multiplier for id_year_month in months}
-            for row in results
-        ]
-        for i, row in enumerate(results):
-            data[i]["ID"] = row.member_id
-            data[i]["Nome"] = row.name
-            data[i]["Total"] = sum(row[2:]) * multiplier
-
-        # Create DataFrame with wanted columns
-        df = pd.DataFrame(data)
-        df = df[["ID", "Nome", "Total"] + months]
-        df = df.sort_values(by=["ID"], inplace=False)
-    else:
-        df = pd.DataFrame(columns=["ID", "Nome", "Total"])
 
+def _df_pivot_table(members: pd.DataFrame, member_mask: np.ndarray, months: List[str], amounts: np.ndarray) -> pd.DataFrame:
+    if not member_mask.any():
+        return pd.DataFrame(columns=["ID", "Nome", "Total"])
+
+    amounts = amounts[member_mask]
+    df = pd.DataFrame(amounts, columns=months)
+    df.insert(0, "ID", members["ID"].to_numpy()[member_mask])
+    df.insert(1, "Nome", members["Nome"].to_numpy()[member_mask])
+    df.insert(2, "Total", amounts.sum(axis=1))
     return df
 
 
@@ -247,50 +345,41 @@ def pivot_table_dues_paid_for_all_members(
         until: str = None,
         just_download: bool = False,
 ) -> Tuple[pd.DataFrame, pd.DataFrame] | StreamingResponse:
-    # Define the months you are interested in
-    months_query = db.query(models.DuesPayment.id_year_month).order_by(models.DuesPayment.id_year_month)
-    if since:
-        since = format_year_month(since)
-        months_query = months_query.filter(models.DuesPayment.date_ym >= since)
-    if until:
-        until = format_year_month(until)
-        months_query = months_query.filter(models.DuesPayment.date_ym <= until)
-    months = [str(id_year_month[0]) for id_year_month in months_query.all()]
-
-    # Build the case statements for each month
-    month_cases = [
-        func.sum(
-            case_(
-            (models.MemberDuesPayment.id_year_month == id_year_month, models.MemberDuesPayment.amount), else_=0
-            )
-        ).label(id_year_month)
-        for id_year_month in months
-    ]
-
-    df_paid = get_df_pivot_table_dues_paid_for_all_members(db, months=months, month_cases=month_cases, is_paid=True)
-    df_missing = get_df_pivot_table_dues_paid_for_all_members(db, months=months, month_cases=month_cases, is_paid=False)
+    since = format_year_month(since) if since else None
+    until = format_year_month(until) if until else None
+    # recomputed only after the dues changed
+    months, df_paid, df_missing = dues_cache.get(
+        db, ("pivot", since, until), lambda: _pivot_table_dues_paid_for_all_members(db, since=since, until=until)
+    )
 
     if just_download:
+        if not months:
+            raise NotFound404(f"No Due Payments from {since or 'the first'} to {until or 'the last'} month to download.")
         filename = f"{NAME} Pivot Associados Quotas de {since or months[0]} a {until or months[-1]}.xlsx"
-        xls = save_to_excel_sheets(
+        xls = dues_cache.get(db, ("pivot_xlsx", since, until), lambda: excel_sheets_to_bytes(
             DataframeSheet(df_paid, "Quotas pagas"),
             DataframeSheet(df_missing, "Quotas em atraso"),
-            filename = filename,
-        )
-        return xls
+        ))
+        return excel_file_response(xls, filename=filename)
 
     return df_paid, df_missing
 
 
-def list_member_dues_payments_order_by_pay_date(
+def _pivot_table_dues_paid_for_all_members(
         db: Session,
         since: str = None,
-        until: str = None,
-        just_download: bool = False,
-) -> List[models.MemberDuesPayment] | StreamingResponse:
+        until: str = None) -> Tuple[List[str], pd.DataFrame, pd.DataFrame]:
+    matrix = dues_matrix.get(db)
+    months = matrix.get_months_between(since, until)
+    return months, *get_df_pivot_table_dues_paid_for_all_members(matrix, months=months)
+
+
+def _select_member_dues_payments_order_by_pay_date(since: datetime.date = None, until: datetime.date = None) -> Select:
     # Query between months for paid dues
-    months_query = db.query(
+    _stmt = select(
         models.MemberDuesPayment
+    ).options(
+        joinedload(models.MemberDuesPayment.member)
     ).filter_by(
         is_paid=True,
         is_member_active=True
@@ -300,40 +389,75 @@ def list_member_dues_payments_order_by_pay_date(
         models.MemberDuesPayment.pay_update_time.desc(),
     )
     if since:
-        since = str2date(since)
-        months_query = months_query.filter(models.MemberDuesPayment.pay_date >= since)
+        _stmt = _stmt.filter(models.MemberDuesPayment.pay_date >= since)
     if until:
-        until = str2date(until)
-        months_query = months_query.filter(models.MemberDuesPayment.pay_date <= until)
+        _stmt = _stmt.filter(models.MemberDuesPayment.pay_date <= until)
+    return _stmt
+
+
+def _member_dues_payments_to_xlsx(
+        mdp_list: List[models.MemberDuesPayment],
+        since: datetime.date = None,
+        until: datetime.date = None) -> StreamingResponse:
+    # Create pandas Dataframe
+    _data = [
+        {
+            "ID": mdp.member_id,
+            "Nome": mdp.member.name,
+            "Quota": mdp.id_year_month,
+            "Valor": mdp.amount,
+            "V.D.": mdp.is_cash,
+            "Data Pagamento": mdp.pay_date,
+            "Data Actualização": mdp.pay_update_time,
+        }
+        for mdp in mdp_list
+    ]
+    _df = pd.DataFrame(_data)
+    since = since or _df['Quota'].min()
+    until = until or _df['Quota'].max()
+
+    # Create file
+    filename = f"{NAME} Lista de pagamento de Quotas de {since} a {until}.xlsx"
+    xls = save_to_excel_sheets(
+        DataframeSheet(_df, "Quotas pagas"),
+        filename=filename
+    )
+    return xls
 
-    mdp_list: List[models.MemberDuesPayment] = months_query.all()
+
+def list_member_dues_payments_order_by_pay_date(
+        db: Session,
+        since: str = None,
+        until: str = None,
+        just_download: bool = False,
+) -> List[models.MemberDuesPayment] | StreamingResponse:
+    since = str2date(since) if since else None
+    until = str2date(until) if until else None
+
+    mdp_list: List[models.MemberDuesPayment] = list(db.scalars(_select_member_dues_payments_order_by_pay_date(since, until)))
+    if not mdp_list:
+        return []
+
+    if just_download:
+        return _member_dues_payments_to_xlsx(mdp_list, since, until)
+
+    return mdp_list
+
+
+async def list_member_dues_payments_order_by_pay_date_async(
+        adb: AsyncSession,
+        since: str = None,
+        until: str = None,
+        just_download: bool = False,
+) -> List[models.MemberDuesPayment] | StreamingResponse:
+    since = str2date(since) if since else None
+    until = str2date(until) if until else None
+
+    mdp_list: List[models.MemberDuesPayment] = list(await adb.scalars(_select_member_dues_payments_order_by_pay_date(since, until)))
     if not mdp_list:
         return []
 
-    # Create pandas Dataframe
     if just_download:
-        _data = [
-            {
-                "ID": mdp.member_id,
-                "Nome": mdp.member.name,
-                "Quota": mdp.id_year_month,
-                "Valor": mdp.amount,
-                "V.D.": mdp.is_cash,
-                "Data Pagamento": mdp.pay_date,
-                "Data Actualização": mdp.pay_update_time,
-            }
-            for mdp in mdp_list
-        ]
-        _df = pd.DataFrame(_data)
-        since = since or _df['Quota'].min()
-        until = until or _df['Quota'].max()
-
-        # Create file
-        filename = f"{NAME} Lista de pagamento de Quotas de {since} a {until}.xlsx"
-        xls = save_to_excel_sheets(
-            DataframeSheet(_df, "Quotas pagas"),
-            filename=filename
-        )
-        return xls
+        return await run_in_threadpool(_member_dues_payments_to_xlsx, mdp_list, since, until)
 
     return mdp_list
@@ -1,14 +1,15 @@
 from typing import List, Optional
 
 import pandas as pd
-from sqlalchemy import or_, desc
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, desc, func, select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from starlette.concurrency import run_in_threadpool
 
 from app import NAME
-from app.db import models, schemas
-from app.db.crud_member import update_member_stats, get_member_by_id
-from app.db.crud_sellers import update_expense_account_stats, update_seller_stats, get_seller_by_id, \
-    get_expense_account_by_id
+from app.db import models, schemas, crud_stats
+from app.db.crud_member import get_member_by_id
+from app.db.crud_sellers import get_seller_by_id, get_expense_account_by_id
 from app.utils import get_now, save_to_excel_sheets, DataframeSheet, StreamingResponse
 from app.utils.errors import NotFound404
 
@@ -33,63 +34,48 @@ def create_item(
     return db_item
 
 
-def get_items_list(db: Session, search_text: str, skip: int = 0, limit: int = 1000, category_id: Optional[int] = None) -> List[models.Item]:
-    _dbq = db.query(models.Item)
+def _select_items(search_text: str, skip: int = 0, limit: int = 1000, category_id: Optional[int] = None) -> Select:
+    # lists and dropdowns show (and group by) the category name
+    _stmt = select(models.Item).options(joinedload(models.Item.category))
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Item.name.ilike(f"%{search_text}%"),
             models.Item.notes.ilike(f"%{search_text}%"),
         ))
     if category_id:
-        _dbq = _dbq.filter_by(category_id=category_id)
-
-    return _dbq.offset(skip).limit(limit).all()
+        _stmt = _stmt.filter_by(category_id=category_id)
 
-def _update_item_and_category_stats(db: Session, item_id: int) -> models.Item:
-    _trans = db.begin(nested=db.in_transaction())
-    try:
-        db_item = get_item_by_id(db, item_id)
+    return _stmt.order_by(models.Item.item_id).offset(skip).limit(limit)
 
-        _result_sellers = db.query(
-            models.SellerItems
-        ).filter_by(
-            item_id=item_id
-        ).all()
 
-        _result_members = db.query(
-            models.MemberItems
-        ).filter_by(
-            item_id=item_id
-        ).all()
-
-        db_item.total_quantity_seller_sold = sum([row.quantity for row in _result_sellers])
-        db_item.total_amount_seller_sold = sum([row.total_price for row in _result_sellers])
-        db_item.total_quantity_member_sold = sum([row.quantity for row in _result_members])
-        db_item.total_amount_member_sold = sum([row.total_price for row in _result_members])
+def get_items_list(db: Session, search_text: str, skip: int = 0, limit: int = 1000, category_id: Optional[int] = None) -> List[models.Item]:
+    return list(db.scalars(_select_items(search_text, skip=skip, limit=limit, category_id=category_id)))
 
-        _trans.session.add(db_item)
 
-        _update_category_stats(db, db_item.category_id)
+async def get_items_list_async(adb: AsyncSession, search_text: str, skip: int = 0, limit: int = 1000, category_id: Optional[int] = None) -> List[models.Item]:
+    return list(await adb.scalars(_select_items(search_text, skip=skip, limit=limit, category_id=category_id)))
 
-        _trans.commit()
-    except:
-        _trans.rollback()
-        raise
 
-    db.refresh(db_item)
-    return db_item
+def _item_view_options() -> list:
+    return [
+        joinedload(models.Item.category),
+        selectinload(models.Item.seller_items).joinedload(models.SellerItems.seller),
+        selectinload(models.Item.seller_items).joinedload(models.SellerItems.expense_account),
+        selectinload(models.Item.member_items).joinedload(models.MemberItems.member),
+    ]
 
 
-def get_item_by_id(db: Session, item_id: int) -> models.Item:
-    db_item = db.get(models.Item, item_id)
+def get_item_by_id(db: Session, item_id: int, options: list = None) -> models.Item:
+    # populate_existing, so the loader options also apply to an item already in the session
+    db_item = db.get(models.Item, item_id, options=options, populate_existing=options is not None)
     if db_item is None:
         raise NotFound404(f"Item {item_id} not found")
     return db_item
 
 
 def get_item(db: Session, item_id: int) -> models.Item:
-    return get_item_by_id(db, item_id)
+    return get_item_by_id(db, item_id, options=_item_view_options())
 
 
 def update_item(
@@ -97,7 +83,6 @@ def update_item(
         db_item: models.Item,
         item_update: schemas.ItemUpdate
 ) -> models.Item:
-    _trans = db.begin(nested=db.in_transaction())
     try:
         old_category = db_item.category_id
         db_item.row_update_time = get_now()
@@ -105,15 +90,15 @@ def update_item(
         for key, value in update_data.items():
             setattr(db_item, key, value)
 
-        _trans.session.add(db_item)
+        db.add(db_item)
 
-        if "category_id" in update_data:
-            _update_category_stats(db, old_category)
-        _update_item_and_category_stats(db, db_item.item_id)
+        if db_item.category_id != old_category:
+            get_category_by_id(db, db_item.category_id)
+            crud_stats.move_item_category_totals(db, db_item, old_category)
 
-        _trans.commit()
+        db.commit()
     except:
-        _trans.rollback()
+        db.rollback()
         raise
 
     db.refresh(db_item)
@@ -140,63 +125,52 @@ def create_category(
     return db_category
 
 
-def get_categories_list(db: Session, search_text: str, skip: int = 0, limit: int = 1000) -> List[models.Category]:
-    _dbq = db.query(models.Category)
+def _select_categories(search_text: str, skip: int = 0, limit: int = 1000) -> Select:
+    _stmt = select(models.Category)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Category.name.ilike(f"%{search_text}%"),
             models.Category.notes.ilike(f"%{search_text}%"),
         ))
 
-    return _dbq.offset(skip).limit(limit).all()
+    return _stmt.order_by(models.Category.category_id).offset(skip).limit(limit)
 
 
-def _update_category_stats(db: Session, category_id: int) -> models.Category:
-    _trans = db.begin(nested=db.in_transaction())
-    try:
-        db_category = get_category_by_id(db, category_id)
-
-        _result_sellers = db.query(
-            models.SellerItems
-        ).join(
-            models.Item
-        ).filter(
-            models.Item.category_id == category_id
-        ).all()
-
-        _result_members = db.query(
-            models.MemberItems
-        ).join(
-            models.Item
-        ).filter(
-            models.Item.category_id == category_id
-        ).all()
-
-        db_category.total_quantity_seller_sold = sum([row.quantity for row in _result_sellers])
-        db_category.total_amount_seller_sold = sum([row.total_price for row in _result_sellers])
-        db_category.total_quantity_member_sold = sum([row.quantity for row in _result_members])
-        db_category.total_amount_member_sold = sum([row.total_price for row in _result_members])
-
-        _trans.session.add(db_category)
-        _trans.commit()
-    except:
-        _trans.rollback()
-        raise
+def _set_categories_total_items(db: Session, categories: List[models.Category]) -> List[models.Category]:
+    # one grouped count for the whole list, instead of loading the items of every category
+    _totals = dict(db.execute(select(
+        models.Item.category_id, func.count(models.Item.item_id)
+    ).filter(
+        models.Item.category_id.in_([category.category_id for category in categories])
+    ).group_by(models.Item.category_id)).all())
+
+    for category in categories:
+        category.total_items = _totals.get(category.category_id, 0)
+    return categories
+
+
+def get_categories_list(db: Session, search_text: str, skip: int = 0, limit: int = 1000, count_items: bool = False) -> List[models.Category]:
+    categories = list(db.scalars(_select_categories(search_text, skip=skip, limit=limit)))
+    if count_items:
+        _set_categories_total_items(db, categories)
+    return categories
 
-    db.refresh(db_category)
-    return db_category
 
+async def get_categories_list_async(adb: AsyncSession, search_text: str, skip: int = 0, limit: int = 1000) -> List[models.Category]:
+    return list(await adb.scalars(_select_categories(search_text, skip=skip, limit=limit)))
 
-def get_category_by_id(db: Session, category_id: int) -> models.Category:
-    db_category = db.get(models.Category, category_id)
+
+def get_category_by_id(db: Session, category_id: int, options: list = None) -> models.Category:
+    # populate_existing, so the loader options also apply to a category already in the session
+    db_category = db.get(models.Category, category_id, options=options, populate_existing=options is not None)
     if db_category is None:
         raise NotFound404(f"Category {category_id} not found")
     return db_category
 
 
 def get_category(db: Session, category_id: int) -> models.Category:
-    return get_category_by_id(db, category_id)
+    return get_category_by_id(db, category_id, options=[selectinload(models.Category.items)])
 
 
 def update_category(db: Session, db_category: models.Category, category_update: schemas.CategoryUpdate) -> models.Category:
@@ -220,7 +194,6 @@ def update_category(db: Session, db_category: models.Category, category_update:
 
 
 def create_seller_item(db: Session, item_id: int, seller_item_create: schemas.SellerItemsCreate) -> models.SellerItems:
-    _trans = db.begin(nested=db.in_transaction())
     try:
         db_seller_item = models.SellerItems(item_id=item_id, **seller_item_create.model_dump())
         db_seller_item.row_update_time = get_now()
@@ -229,15 +202,13 @@ def create_seller_item(db: Session, item_id: int, seller_item_create: schemas.Se
         get_seller_by_id(db, db_seller_item.seller_id)
         get_expense_account_by_id(db, db_seller_item.ea_id)
 
-        _trans.session.add(db_seller_item)
+        db.add(db_seller_item)
 
-        update_expense_account_stats(db, db_seller_item.ea_id)
-        update_seller_stats(db, db_seller_item.seller_id)
-        _update_item_and_category_stats(db, db_seller_item.item_id)
+        crud_stats.add_seller_item_totals(db, *_seller_item_totals_key(db_seller_item))
 
-        _trans.commit()
+        db.commit()
     except:
-        _trans.rollback()
+        db.rollback()
         raise
 
     db.refresh(db_seller_item)
@@ -258,73 +229,94 @@ def get_item_sellers_list(db: Session, item_id: int, skip: int, limit: int, sear
     return _dbq.order_by(desc(models.SellerItems.purchase_date)).offset(skip).limit(limit).all()
 
 
-def get_sellers_items_list(
-        db: Session,
+def _seller_item_loader_options() -> list:
+    return [
+        joinedload(models.SellerItems.seller),
+        joinedload(models.SellerItems.expense_account),
+        joinedload(models.SellerItems.item).joinedload(models.Item.category),
+    ]
+
+
+def _select_sellers_items(
         item_id: int, category_id: int,
         seller_id: int, ea_id: int,
         since: str, until: str,
-        just_download: bool,
-        tid: int, search_text: str,
+        search_text: str,
         skip: int = 0, limit: int = 1000
-) -> List[models.SellerItems] | StreamingResponse:
-    if tid:
-        return [get_seller_item_by_id(db, tid=tid)]
-
-    _dbq: db.query = db.query(models.SellerItems).join(models.Item).join(models.Seller)
+) -> Select:
+    _stmt = select(models.SellerItems).join(models.Item).join(models.Seller).options(*_seller_item_loader_options())
 
     if since:
-        _dbq = _dbq.filter(models.SellerItems.purchase_date >= since)
+        _stmt = _stmt.filter(models.SellerItems.purchase_date >= since)
     if until:
-        _dbq = _dbq.filter(models.SellerItems.purchase_date <= until)
+        _stmt = _stmt.filter(models.SellerItems.purchase_date <= until)
     if item_id:
-        _dbq = _dbq.filter(models.SellerItems.item_id == item_id)
+        _stmt = _stmt.filter(models.SellerItems.item_id == item_id)
     if seller_id:
-        _dbq = _dbq.filter(models.SellerItems.seller_id == seller_id)
+        _stmt = _stmt.filter(models.SellerItems.seller_id == seller_id)
     if ea_id:
-        _dbq = _dbq.filter(models.SellerItems.ea_id == ea_id)
+        _stmt = _stmt.filter(models.SellerItems.ea_id == ea_id)
     if category_id:
-        _dbq = _dbq.filter(models.Item.category_id == category_id)
+        _stmt = _stmt.filter(models.Item.category_id == category_id)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Seller.name.ilike(f"%{search_text}%"),
             models.SellerItems.notes.ilike(f"%{search_text}%"),
             models.Item.name.ilike(f"%{search_text}%"),
             models.Item.notes.ilike(f"%{search_text}%"),
         ))
 
-    results: List[models.SellerItems] = _dbq.order_by(desc(models.SellerItems.purchase_date)).offset(skip).limit(limit).all()
-    if not results:
-        results = []
+    return _stmt.order_by(desc(models.SellerItems.purchase_date)).offset(skip).limit(limit)
+
+
+def _sellers_items_to_xlsx(results: List[models.SellerItems], since: str, until: str) -> StreamingResponse:
+    _data = [
+        {
+            "ID": row.tid,
+            "Vendedor": row.seller.name,
+            "Rúbrica": row.expense_account.name,
+            "Categoria": row.item.category.name,
+            "Item": row.item.name,
+            "Qtd compra": row.quantity,
+            "Valor compra": row.total_price,
+            "Notas": row.notes,
+            "V.D.": row.is_cash,
+            "Data Pagamento": row.purchase_date,
+            "Data Actualização": row.row_update_time,
+        }
+        for row in results
+    ]
+    _df = pd.DataFrame(_data)
+    since = since or _df['Data Pagamento'].min()
+    until = until or _df['Data Pagamento'].max()
+
+    # Create file
+    filename = f"{NAME} Lista de compras a vendedores de {since} a {until}.xlsx"
+    xls = save_to_excel_sheets(
+        DataframeSheet(_df, "Compras"),
+        filename=filename
+    )
+    return xls
+
+
+async def get_sellers_items_list_async(
+        adb: AsyncSession,
+        item_id: int, category_id: int,
+        seller_id: int, ea_id: int,
+        since: str, until: str,
+        just_download: bool,
+        tid: int, search_text: str,
+        skip: int = 0, limit: int = 1000
+) -> List[models.SellerItems] | StreamingResponse:
+    if tid:
+        return [await get_seller_item_by_id_async(adb, tid=tid)]
+
+    _stmt = _select_sellers_items(item_id, category_id, seller_id, ea_id, since, until, search_text, skip=skip, limit=limit)
+    results: List[models.SellerItems] = list(await adb.scalars(_stmt))
 
     if just_download:
-        _data = [
-            {
-                "ID": row.tid,
-                "Vendedor": row.seller.name,
-                "Rúbrica": row.expense_account.name,
-                "Categoria": row.item.category.name,
-                "Item": row.item.name,
-                "Qtd compra": row.quantity,
-                "Valor compra": row.total_price,
-                "Notas": row.notes,
-                "V.D.": row.is_cash,
-                "Data Pagamento": row.purchase_date,
-                "Data Actualização": row.row_update_time,
-            }
-            for row in results
-        ]
-        _df = pd.DataFrame(_data)
-        since = since or _df['Data Pagamento'].min()
-        until = until or _df['Data Pagamento'].max()
-
-        # Create file
-        filename = f"{NAME} Lista de compras a vendedores de {since} a {until}.xlsx"
-        xls = save_to_excel_sheets(
-            DataframeSheet(_df, "Compras"),
-            filename=filename
-        )
-        return xls
+        return await run_in_threadpool(_sellers_items_to_xlsx, results, since, until)
 
     return results
 
@@ -336,38 +328,49 @@ def get_seller_item_by_id(db: Session, tid: int) -> models.SellerItems:
     return db_seller_item
 
 
+async def get_seller_item_by_id_async(adb: AsyncSession, tid: int) -> models.SellerItems:
+    db_seller_item = await adb.get(models.SellerItems, tid, options=_seller_item_loader_options())
+    if db_seller_item is None:
+        raise NotFound404(f"Seller Item {tid} not found")
+    return db_seller_item
+
+
 def get_seller_item(db: Session, tid: int) -> models.SellerItems:
     return get_seller_item_by_id(db, tid)
 
 
+def _seller_item_totals_key(db_seller_item: models.SellerItems) -> tuple:
+    return (db_seller_item.seller_id, db_seller_item.ea_id, db_seller_item.item_id,
+            db_seller_item.quantity, db_seller_item.total_price, db_seller_item.purchase_date)
+
+
 def update_seller_item(db: Session, db_seller_item: models.SellerItems, seller_item_update: schemas.SellerItemsUpdate) -> models.SellerItems:
-    _trans = db.begin(nested=db.in_transaction())
     try:
-        old_ea_id = db_seller_item.ea_id
-        old_seller_id = db_seller_item.seller_id
-        old_item_id = db_seller_item.item_id
+        old_values = _seller_item_totals_key(db_seller_item)
 
         db_seller_item.row_update_time = get_now()
         update_data = seller_item_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_seller_item, key, value)
 
-        _trans.session.add(db_seller_item)
-
-        if "ea_id" in update_data and update_data["ea_id"] != old_ea_id:
-            update_expense_account_stats(db, old_ea_id)
-        if "seller_id" in update_data and update_data["seller_id"] != old_seller_id:
-            update_seller_stats(db, old_seller_id)
-        if "item_id" in update_data and update_data["item_id"] != old_item_id:
-            _update_item_and_category_stats(db, old_item_id)
+        db.add(db_seller_item)
+
+        # take the old row out of the totals it counted for and add the new one, also when moved to another item/seller/ea/month
+        new_values = _seller_item_totals_key(db_seller_item)
+        if new_values != old_values:
+            old_seller_id, old_ea_id, old_item_id, old_quantity, old_total_price, old_purchase_date = old_values
+            if db_seller_item.item_id != old_item_id:
+                get_item_by_id(db, db_seller_item.item_id)
+            if db_seller_item.seller_id != old_seller_id:
+                get_seller_by_id(db, db_seller_item.seller_id)
+            if db_seller_item.ea_id != old_ea_id:
+                get_expense_account_by_id(db, db_seller_item.ea_id)
+            crud_stats.add_seller_item_totals(db, old_seller_id, old_ea_id, old_item_id, -(old_quantity or 0), -(old_total_price or 0.0), old_purchase_date)
+            crud_stats.add_seller_item_totals(db, *new_values)
 
-        update_expense_account_stats(db, db_seller_item.ea_id)
-        update_seller_stats(db, db_seller_item.seller_id)
-        _update_item_and_category_stats(db, db_seller_item.item_id)
-
-        _trans.commit()
+        db.commit()
     except:
-        _trans.rollback()
+        db.rollback()
         raise
 
     db.refresh(db_seller_item)
@@ -378,7 +381,6 @@ def update_seller_item(db: Session, db_seller_item: models.SellerItems, seller_i
 
 
 def create_member_item(db: Session, item_id: int, member_item_create: schemas.MemberItemsCreate) -> models.MemberItems:
-    _trans = db.begin(nested=db.in_transaction())
     try:
         db_member_item = models.MemberItems(item_id=item_id, **member_item_create.model_dump())
         db_member_item.row_update_time = get_now()
@@ -386,14 +388,13 @@ def create_member_item(db: Session, item_id: int, member_item_create: schemas.Me
         get_item_by_id(db, item_id)
         get_member_by_id(db, db_member_item.member_id)
 
-        _trans.session.add(db_member_item)
+        db.add(db_member_item)
 
-        _update_item_and_category_stats(db, db_member_item.item_id)
-        update_member_stats(db, db_member_item.member_id)
+        crud_stats.add_member_item_totals(db, *_member_item_totals_key(db_member_item))
 
-        _trans.commit()
+        db.commit()
     except:
-        _trans.rollback()
+        db.rollback()
         raise
 
     db.refresh(db_member_item)
@@ -414,70 +415,90 @@ def get_item_members_list(db: Session, item_id: int, skip: int, limit: int, sear
     return _dbq.order_by(desc(models.MemberItems.purchase_date)).offset(skip).limit(limit).all()
 
 
-def get_members_items_list(
-        db: Session,
+def _member_item_loader_options() -> list:
+    return [
+        joinedload(models.MemberItems.member),
+        joinedload(models.MemberItems.item).joinedload(models.Item.category),
+    ]
+
+
+def _select_members_items(
         item_id: int, category_id: int,
         member_id: int,
         since: str, until: str,
-        just_download: bool,
-        tid: int, search_text: str,
+        search_text: str,
         skip: int = 0, limit: int = 1000
-) -> List[models.MemberItems] | StreamingResponse:
-    if tid:
-        return [get_member_item_by_id(db, tid=tid)]
-
-    _dbq: db.query = db.query(models.MemberItems).join(models.Item).join(models.Member)
+) -> Select:
+    _stmt = select(models.MemberItems).join(models.Item).join(models.Member).options(*_member_item_loader_options())
 
     if since:
-        _dbq = _dbq.filter(models.MemberItems.purchase_date >= since)
+        _stmt = _stmt.filter(models.MemberItems.purchase_date >= since)
     if until:
-        _dbq = _dbq.filter(models.MemberItems.purchase_date <= until)
+        _stmt = _stmt.filter(models.MemberItems.purchase_date <= until)
     if item_id:
-        _dbq = _dbq.filter(models.MemberItems.item_id == item_id)
+        _stmt = _stmt.filter(models.MemberItems.item_id == item_id)
     if member_id:
-        _dbq = _dbq.filter(models.MemberItems.member_id == member_id)
+        _stmt = _stmt.filter(models.MemberItems.member_id == member_id)
     if category_id:
-        _dbq = _dbq.filter(models.Item.category_id == category_id)
+        _stmt = _stmt.filter(models.Item.category_id == category_id)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Member.name.ilike(f"%{search_text}%"),
             models.MemberItems.notes.ilike(f"%{search_text}%"),
             models.Item.name.ilike(f"%{search_text}%"),
             models.Item.notes.ilike(f"%{search_text}%"),
         ))
 
-    results: List[models.MemberItems] = _dbq.order_by(desc(models.MemberItems.purchase_date)).offset(skip).limit(limit).all()
-    if not results:
-        results = []
+    return _stmt.order_by(desc(models.MemberItems.purchase_date)).offset(skip).limit(limit)
+
+
+def _members_items_to_xlsx(results: List[models.MemberItems], since: str, until: str) -> StreamingResponse:
+    _data = [
+        {
+            "ID": row.tid,
+            "Associado": row.member.name,
+            "Categoria": row.item.category.name,
+            "Item": row.item.name,
+            "Qtd venda": row.quantity,
+            "Valor venda": row.total_price,
+            "Notas": row.notes,
+            "V.D.": row.is_cash,
+            "Data Pagamento": row.purchase_date,
+            "Data Actualização": row.row_update_time,
+        }
+        for row in results
+    ]
+    _df = pd.DataFrame(_data)
+    since = since or _df['Data Pagamento'].min()
+    until = until or _df['Data Pagamento'].max()
+
+    # Create file
+    filename = f"{NAME} Lista de vendas a associados de {since} a {until}.xlsx"
+    xls = save_to_excel_sheets(
+        DataframeSheet(_df, "Vendas"),
+        filename=filename
+    )
+    return xls
+
+
+async def get_members_items_list_async(
+        adb: AsyncSession,
+        item_id: int, category_id: int,
+        member_id: int,
+        since: str, until: str,
+        just_download: bool,
+        tid: int, search_text: str,
+        skip: int = 0, limit: int = 1000
+) -> List[models.MemberItems] | StreamingResponse:
+    if tid:
+        return [await get_member_item_by_id_async(adb, tid=tid)]
+
+    _stmt = _select_members_items(item_id, category_id, member_id, since, until, search_text, skip=skip, limit=limit)
+    results: List[models.MemberItems] = list(await adb.scalars(_stmt))
 
     if just_download:
-        _data = [
-            {
-                "ID": row.tid,
-                "Associado": row.member.name,
-                "Categoria": row.item.category.name,
-                "Item": row.item.name,
-                "Qtd venda": row.quantity,
-                "Valor venda": row.total_price,
-                "Notas": row.notes,
-                "V.D.": row.is_cash,
-                "Data Pagamento": row.purchase_date,
-                "Data Actualização": row.row_update_time,
-            }
-            for row in results
-        ]
-        _df = pd.DataFrame(_data)
-        since = since or _df['Data Pagamento'].min()
-        until = until or _df['Data Pagamento'].max()
-
-        # Create file
-        filename = f"{NAME} Lista de vendas a associados de {since} a {until}.xlsx"
-        xls = save_to_excel_sheets(
-            DataframeSheet(_df, "Vendas"),
-            filename=filename
-        )
-        return xls
+        return await run_in_threadpool(_members_items_to_xlsx, results, since, until)
 
     return results
 
@@ -489,34 +510,47 @@ def get_member_item_by_id(db: Session, tid: int) -> models.MemberItems:
     return db_member_item
 
 
+async def get_member_item_by_id_async(adb: AsyncSession, tid: int) -> models.MemberItems:
+    db_member_item = await adb.get(models.MemberItems, tid, options=_member_item_loader_options())
+    if db_member_item is None:
+        raise NotFound404(f"Member Item {tid} not found")
+    return db_member_item
+
+
 def get_member_item(db: Session, tid: int) -> models.MemberItems:
     return get_member_item_by_id(db, tid)
 
 
+def _member_item_totals_key(db_member_item: models.MemberItems) -> tuple:
+    return (db_member_item.member_id, db_member_item.item_id,
+            db_member_item.quantity, db_member_item.total_price, db_member_item.purchase_date)
+
+
 def update_member_item(db: Session, db_member_item: models.MemberItems, member_item_update: schemas.MemberItemsUpdate) -> models.MemberItems:
-    _trans = db.begin(nested=db.in_transaction())
     try:
-        old_item_id = db_member_item.item_id
-        old_member_id = db_member_item.member_id
+        old_values = _member_item_totals_key(db_member_item)
 
         db_member_item.row_update_time = get_now()
         update_data = member_item_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_member_item, key, value)
 
-        _trans.session.add(db_member_item)
-
-        if "member_id" in update_data and update_data["member_id"] != old_member_id:
-            update_member_stats(db, old_member_id)
-        if "item_id" in update_data and update_data["item_id"] != old_item_id:
-            _update_item_and_category_stats(db, old_item_id)
+        db.add(db_member_item)
 
-        _update_item_and_category_stats(db, db_member_item.item_id)
-        update_member_stats(db, db_member_item.member_id)
+        # take the old row out of the totals it counted for and add the new one, also when moved to another item/member/month
+        new_values = _member_item_totals_key(db_member_item)
+        if new_values != old_values:
+            old_member_id, old_item_id, old_quantity, old_total_price, old_purchase_date = old_values
+            if db_member_item.item_id != old_item_id:
+                get_item_by_id(db, db_member_item.item_id)
+            if db_member_item.member_id != old_member_id:
+                get_member_by_id(db, db_member_item.member_id)
+            crud_stats.add_member_item_totals(db, old_member_id, old_item_id, -(old_quantity or 0), -(old_total_price or 0.0), old_purchase_date)
+            crud_stats.add_member_item_totals(db, *new_values)
 
-        _trans.commit()
+        db.commit()
     except:
-        _trans.rollback()
+        db.rollback()
         raise
 
     db.refresh(db_member_item)
@@ -1,26 +1,42 @@
 from typing import List
 
 import pandas as pd
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select, Select, Subquery, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload, joinedload
+from starlette.concurrency import run_in_threadpool
 
 from app import NAME
-from app.db import models, schemas
-from app.db.crud_dues_payments import get_member_due_payment_missing_stats, make_due_payment_for_new_member
+from app.db import models, schemas, crud_stats
+from app.db.crud_dues_payments import get_member_due_payment_missing_stats, make_due_payment_for_new_members
 from app.utils import get_now, get_today_year_month_str, str2date, save_to_excel_sheets, DataframeSheet, \
-    StreamingResponse
+    StreamingResponse, date
 from app.utils.errors import NotFound404, Conflict409
 
 
-def get_member_by_id(db: Session, member_id: int) -> models.Member:
-    member = db.get(models.Member, member_id)
+def _member_view_options() -> list:
+    return [
+        selectinload(models.Member.member_history),
+        selectinload(models.Member.member_due_payment),
+        selectinload(models.Member.member_donations),
+        selectinload(models.Member.member_items).joinedload(models.MemberItems.item).joinedload(models.Item.category),
+    ]
+
+
+def get_member_by_id(db: Session, member_id: int, options: list = None) -> models.Member:
+    # populate_existing, so the loader options also apply to a member already in the session
+    member = db.get(models.Member, member_id, options=options, populate_existing=options is not None)
     if member is None:
         raise NotFound404(f"Member {member_id} not found")
     return member
 
 
+def get_member_view(db: Session, member_id: int) -> models.Member:
+    return get_member_by_id(db, member_id, options=_member_view_options())
+
+
 def get_member(db: Session, member_id: int) -> models.Member:
-    member = get_member_by_id(db, member_id)
+    member = get_member_view(db, member_id)
 
     months_missing, total_amount_missing = get_member_due_payment_missing_stats(db, member_id)
 
@@ -31,25 +47,56 @@ def get_member(db: Session, member_id: int) -> models.Member:
     return member
 
 
-def _get_all_members(
-        db: Session,
+def _select_members_dues(only_due_missing: bool) -> Subquery:
+    # per member: months (and their amount) missing until this month, or paid
+    _mdp = models.MemberDuesPayment
+    if only_due_missing:
+        _filter = (models.MDP_UNPAID_ACTIVE, _mdp.id_year_month <= get_today_year_month_str())
+    else:
+        _filter = (_mdp.is_paid == true(), _mdp.is_member_active == true())
+    return select(
+        _mdp.member_id,
+        func.count().label("total_months"),
+        func.coalesce(func.sum(_mdp.amount), 0.0).label("total_amount"),
+    ).filter(*_filter).group_by(_mdp.member_id).subquery()
+
+
+def _select_all_members(
         active_members: bool = None,
         search_text: str = None,
-        skip: int = 0, limit: int = 1000) -> List[models.Member]:
-    _dbq = db.query(models.Member)
+        skip: int = 0, limit: int = 1000,
+        only_due_missing: bool = None) -> Select:
+    _stmt = select(models.Member)
 
     if active_members is not None:
-        _dbq = _dbq.filter_by(is_active=active_members)
+        _stmt = _stmt.filter_by(is_active=active_members)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Member.name.ilike(f"%{search_text}%"),
             models.Member.tlf.ilike(f"%{search_text}%"),
             models.Member.email.ilike(f"%{search_text}%"),
             models.Member.notes.ilike(f"%{search_text}%"),
         ))
 
-    return _dbq.offset(skip).limit(limit).all()
+    # filtered before the offset/limit, so the pages only have the members asked for
+    if only_due_missing is not None:
+        _dues = _select_members_dues(only_due_missing)
+        _stmt = _stmt.join(_dues, _dues.c.member_id == models.Member.member_id).add_columns(
+            _dues.c.total_months, _dues.c.total_amount
+        )
+
+    return _stmt.order_by(models.Member.member_id).offset(skip).limit(limit)
+
+
+def _members_with_dues(rows: list, only_due_missing: bool) -> List[models.Member]:
+    members = []
+    for member, total_months, total_amount in rows:
+        if only_due_missing:
+            member.total_months_missing = total_months
+            member.total_amount_missing = total_amount
+        members.append(member)
+    return members
 
 
 def get_members_list(
@@ -58,49 +105,56 @@ def get_members_list(
         only_due_missing: bool = None,
         only_active_members: bool = None,
         search_text: str = "") -> List[models.Member]:
-    _all_members_filtered = _get_all_members(db, only_active_members, search_text, skip=skip, limit=limit)
+    _stmt = _select_all_members(only_active_members, search_text, skip=skip, limit=limit, only_due_missing=only_due_missing)
 
     if only_due_missing is None:
-        return _all_members_filtered
+        return list(db.scalars(_stmt))
 
-    is_dues_payments_empty = db.query(models.DuesPayment).first() is None
-    if is_dues_payments_empty and only_due_missing:
-        return []
+    return _members_with_dues(db.execute(_stmt).all(), only_due_missing)
 
-    _this_month = get_today_year_month_str()
-    result = []
-    for member in _all_members_filtered:
-        mdps = []
-        for mdp in member.member_due_payment:
-            if only_due_missing:
-                if not mdp.is_paid and mdp.is_member_active and mdp.id_year_month <= _this_month:
-                    mdps.append(mdp.amount)
-            else:
-                if mdp.is_paid and mdp.is_member_active:
-                    mdps.append(mdp.amount)
-        if mdps:
-            if only_due_missing:
-                member.total_months_missing = len(mdps)
-                member.total_amount_missing = sum(mdps)
-            result.append(member)
-    return result
+
+async def get_members_list_async(
+        adb: AsyncSession,
+        skip: int = 0, limit: int = 1000,
+        only_due_missing: bool = None,
+        only_active_members: bool = None,
+        search_text: str = "") -> List[models.Member]:
+    _stmt = _select_all_members(only_active_members, search_text, skip=skip, limit=limit, only_due_missing=only_due_missing)
+
+    if only_due_missing is None:
+        return list(await adb.scalars(_stmt))
+
+    return _members_with_dues((await adb.execute(_stmt)).all(), only_due_missing)
 
 
 def create_member(db: Session, member_create: schemas.MemberCreate) -> models.Member:
-    db_member = models.Member(**member_create.model_dump())
+    return create_members(db, [member_create])[0]
+
+
+def create_members(db: Session, members_create: List[schemas.MemberCreate]) -> List[models.Member]:
+    # the members, all their dues since their start date and their history in one transaction
+    db_members = [models.Member(**member_create.model_dump()) for member_create in members_create]
     try:
-        db.add(db_member)
+        db.add_all(db_members)
+        db.flush()
+        member_ids = [db_member.member_id for db_member in db_members]
+        make_due_payment_for_new_members(db=db, member_ids=member_ids)
+
+        # with the dues totals just set by the database
+        db.add_all([_member_history_of(db_member) for db_member in db.scalars(
+            _select_members_by_ids(member_ids).execution_options(populate_existing=True)
+        )])
         db.commit()
-        db.refresh(db_member)
     except:
         db.rollback()
         raise
 
-    _member_id = db_member.member_id
-    make_due_payment_for_new_member(db=db, member=db_member)
-    _create_member_history(db=db, member=get_member_by_id(db, _member_id))
+    # the commit expired them, reloaded with one query instead of one per member
+    return list(db.scalars(_select_members_by_ids(member_ids)))
 
-    return db_member
+
+def _select_members_by_ids(member_ids: List[int]) -> Select:
+    return select(models.Member).filter(models.Member.member_id.in_(member_ids)).order_by(models.Member.member_id)
 
 
 def update_member(
@@ -108,11 +162,15 @@ def update_member(
         db_member: models.Member,
         member_update: schemas.MemberUpdate) -> models.Member:
     update_data = member_update.model_dump(exclude_unset=True)
+    renamed = "name" in update_data and update_data["name"] != db_member.name
     for key, value in update_data.items():
         setattr(db_member, key, value)
 
     try:
         db.add(db_member)
+        # the dues pivot shows the member's name
+        if renamed:
+            crud_stats.add_dues_changes(db, members={db_member.member_id: db_member.name})
         db.commit()
         db.refresh(db_member)
     except:
@@ -145,9 +203,7 @@ def update_member_active(
                 member_id=db_member.member_id, is_paid=True, is_member_active=False
             ).filter(models.MemberDuesPayment.id_year_month >= since).all()
             for mdp in mdpl:
-                # update member stats
-                db_member.total_months_missing += 1
-                db_member.total_amount_missing += db_member.amount
+                old_state = crud_stats.member_due_state(mdp)
 
                 # set MemberDuesPayment for re-activated user
                 mdp.is_paid = False
@@ -156,26 +212,31 @@ def update_member_active(
                 mdp.pay_update_time = now
 
                 db.add(mdp)
+
+                # update member and month stats
+                crud_stats.change_member_due_totals(db, mdp, old_state)
         else:
             # deactivate member - delete future due payments
             mdpl = db.query(
                 models.MemberDuesPayment
-            ).filter_by(
-                member_id=db_member.member_id, is_paid=False, is_member_active=True
+            ).filter(
+                models.MemberDuesPayment.member_id == db_member.member_id,
+                models.MDP_UNPAID_ACTIVE,
+                models.MemberDuesPayment.id_year_month >= since
             ).all()
             for mdp in mdpl:
-                if mdp.id_year_month >= since:
-                    # update member stats
-                    db_member.total_months_missing -= 1
-                    db_member.total_amount_missing -= mdp.amount
+                old_state = crud_stats.member_due_state(mdp)
+
+                # set MemberDuesPayment 0 eur for inactive user
+                mdp.is_paid = True
+                mdp.is_member_active = False
+                mdp.amount = 0.0
+                mdp.pay_update_time = now
 
-                    # set MemberDuesPayment 0 eur for inactive user
-                    mdp.is_paid = True
-                    mdp.is_member_active = False
-                    mdp.amount = 0.0
-                    mdp.pay_update_time = now
+                db.add(mdp)
 
-                    db.add(mdp)
+                # update member and month stats
+                crud_stats.change_member_due_totals(db, mdp, old_state)
 
         db.commit()
     except:
@@ -193,19 +254,22 @@ def update_member_amount(
     if not db_member.is_active:
         raise Conflict409(f"Member {db_member.member_id} is not active. You must activate the user first if you want to change the amount.")
 
-    mdpl = db.query(models.MemberDuesPayment).filter_by(
-        member_id=db_member.member_id,
-        is_paid=False
-    ).filter(
+    # unpaid dues are always of an active member, the full predicate lets the partial index be used
+    mdpl = db.query(models.MemberDuesPayment).filter(
+        models.MemberDuesPayment.member_id == db_member.member_id,
+        models.MDP_UNPAID_ACTIVE,
         models.MemberDuesPayment.id_year_month >= member_update.since
     ).all()
     try:
         for mdp in mdpl:
             # change future due payments
-            db_member.total_amount_missing += member_update.amount - mdp.amount
+            old_state = crud_stats.member_due_state(mdp)
             mdp.amount = member_update.amount
             db.add(mdp)
 
+            # update member and month stats
+            crud_stats.change_member_due_totals(db, mdp, old_state)
+
         db.add(db_member)
         db.commit()
     except:
@@ -216,13 +280,17 @@ def update_member_amount(
     return db_member
 
 
-def _create_member_history(db: Session, member: models.Member) -> schemas.MemberHistory:
+def _member_history_of(member: models.Member) -> models.MemberHistory:
     args = {
         "since": get_today_year_month_str(),
         "date_time": get_now()
     }
     args.update(**_get_fields(member.__dict__))
-    db_member_history = models.MemberHistory(**args)
+    return models.MemberHistory(**args)
+
+
+def _create_member_history(db: Session, member: models.Member) -> schemas.MemberHistory:
+    db_member_history = _member_history_of(member)
 
     try:
         db.add(db_member_history)
@@ -250,81 +318,86 @@ def post_member_donation(db: Session, member_id: int, member_donation_create: sc
     return db_member
 
 
-def list_member_donations_order_by_pay_date(
-        db: Session,
-        since: str = None,
-        until: str = None,
-        just_download: bool = False,
-) -> List[models.MemberDonation] | StreamingResponse:
+def _select_member_donations_order_by_pay_date(since: date = None, until: date = None) -> Select:
     # Query between months for paid dues
-    months_query = db.query(
+    _stmt = select(
         models.MemberDonation
+    ).options(
+        joinedload(models.MemberDonation.member)
     ).order_by(
         models.MemberDonation.pay_date.desc(),
         models.MemberDonation.member_id,
         models.MemberDonation.pay_update_time.desc(),
     )
     if since:
-        since = str2date(since)
-        months_query = months_query.filter(models.MemberDonation.pay_date >= since)
+        _stmt = _stmt.filter(models.MemberDonation.pay_date >= since)
     if until:
-        until = str2date(until)
-        months_query = months_query.filter(models.MemberDonation.pay_date <= until)
+        _stmt = _stmt.filter(models.MemberDonation.pay_date <= until)
+    return _stmt
+
 
-    md_list: List[models.MemberDonation] = months_query.all()
+def _member_donations_to_xlsx(md_list: List[models.MemberDonation], since: date = None, until: date = None) -> StreamingResponse:
+    # Create pandas Dataframe
+    _data = [
+        {
+            "Associado ID": md.member_id,
+            "Nome": md.member.name,
+            "Valor": md.amount,
+            "V.D.": md.is_cash,
+            "Data Pagamento": md.pay_date,
+            "Data Actualização": md.pay_update_time,
+        }
+        for md in md_list
+    ]
+    _df = pd.DataFrame(_data)
+    since = since or _df['Data Pagamento'].min()
+    until = until or _df['Data Pagamento'].max()
+
+    # Create file
+    filename = f"{NAME} Lista de donativos de {since} a {until}.xlsx"
+    xls = save_to_excel_sheets(
+        DataframeSheet(_df, "Donativos"),
+        filename=filename
+    )
+    return xls
+
+
+def list_member_donations_order_by_pay_date(
+        db: Session,
+        since: str = None,
+        until: str = None,
+        just_download: bool = False,
+) -> List[models.MemberDonation] | StreamingResponse:
+    since = str2date(since) if since else None
+    until = str2date(until) if until else None
+
+    md_list: List[models.MemberDonation] = list(db.scalars(_select_member_donations_order_by_pay_date(since, until)))
     if not md_list:
         return []
 
-    # Create pandas Dataframe
     if just_download:
-        _data = [
-            {
-                "Associado ID": md.member_id,
-                "Nome": md.member.name,
-                "Valor": md.amount,
-                "V.D.": md.is_cash,
-                "Data Pagamento": md.pay_date,
-                "Data Actualização": md.pay_update_time,
-            }
-            for md in md_list
-        ]
-        _df = pd.DataFrame(_data)
-        since = since or _df['Data Pagamento'].min()
-        until = until or _df['Data Pagamento'].max()
-
-        # Create file
-        filename = f"{NAME} Lista de donativos de {since} a {until}.xlsx"
-        xls = save_to_excel_sheets(
-            DataframeSheet(_df, "Donativos"),
-            filename=filename
-        )
-        return xls
+        return _member_donations_to_xlsx(md_list, since, until)
 
     return md_list
 
 
-def update_member_stats(db: Session, member_id: int) -> models.Member:
-    _trans = db.begin(nested=db.in_transaction())
-    try:
-        db_member = get_member_by_id(db, member_id)
-
-        _results = db.query(
-            models.MemberItems
-        ).filter_by(
-            member_id=member_id
-        ).all()
+async def list_member_donations_order_by_pay_date_async(
+        adb: AsyncSession,
+        since: str = None,
+        until: str = None,
+        just_download: bool = False,
+) -> List[models.MemberDonation] | StreamingResponse:
+    since = str2date(since) if since else None
+    until = str2date(until) if until else None
 
-        db_member.total_quantity_bought = sum([row.quantity for row in _results])
-        db_member.total_amount_bought = sum([row.total_price for row in _results])
+    md_list: List[models.MemberDonation] = list(await adb.scalars(_select_member_donations_order_by_pay_date(since, until)))
+    if not md_list:
+        return []
 
-        _trans.session.add(db_member)
-        _trans.commit()
-    except:
-        _trans.rollback()
-        raise
+    if just_download:
+        return await run_in_threadpool(_member_donations_to_xlsx, md_list, since, until)
 
-    db.refresh(db_member)
-    return db_member
+    return md_list
 
 
 def _get_fields(d: dict) -> dict:
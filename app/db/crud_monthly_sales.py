@@ -0,0 +1,42 @@
+from typing import List
+
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.crud_stats import MONTHLY_SALES_KINDS, get_primary_key
+from app.utils import format_year_month
+from app.utils.errors import NotFound404
+
+
+def _select_monthly_sales(kind: str, entity_id: int = None, since: str = None, until: str = None) -> Select:
+    model = MONTHLY_SALES_KINDS.get(kind)
+    if model is None:
+        raise NotFound404(f"Monthly sales of {kind} not found, use one of {list(MONTHLY_SALES_KINDS)}")
+
+    _ms = models.MonthlySales
+    _stmt = select(
+        _ms.kind, _ms.entity_id, model.name, _ms.id_year_month,
+        _ms.total_amount_seller_sold, _ms.total_quantity_seller_sold,
+        _ms.total_amount_member_sold, _ms.total_quantity_member_sold,
+    ).join(
+        model, get_primary_key(model) == _ms.entity_id
+    ).filter(_ms.kind == kind)
+
+    if entity_id is not None:
+        _stmt = _stmt.filter(_ms.entity_id == entity_id)
+    if since:
+        _stmt = _stmt.filter(_ms.id_year_month >= format_year_month(since))
+    if until:
+        _stmt = _stmt.filter(_ms.id_year_month <= format_year_month(until))
+
+    return _stmt.order_by(_ms.id_year_month, model.name)
+
+
+def get_monthly_sales_list(db: Session, kind: str, entity_id: int = None, since: str = None, until: str = None) -> List:
+    return list(db.execute(_select_monthly_sales(kind, entity_id, since, until)))
+
+
+async def get_monthly_sales_list_async(adb: AsyncSession, kind: str, entity_id: int = None, since: str = None, until: str = None) -> List:
+    return list(await adb.execute(_select_monthly_sales(kind, entity_id, since, until)))
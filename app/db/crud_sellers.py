@@ -1,7 +1,8 @@
 from typing import List
 
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, func, select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.db import models, schemas
 from app.utils import get_now
@@ -22,53 +23,57 @@ def create_seller(db: Session, seller_create: schemas.SellerCreate) -> models.Se
     return db_seller
 
 
-def get_sellers_list(db: Session, skip: int = 0, limit: int = 1000, search_text: str = None) -> List[models.Seller]:
-    _dbq = db.query(models.Seller)
+def _select_sellers(skip: int = 0, limit: int = 1000, search_text: str = None) -> Select:
+    _stmt = select(models.Seller)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.Seller.name.ilike(f"%{search_text}%"),
             models.Seller.tlf.ilike(f"%{search_text}%"),
             models.Seller.email.ilike(f"%{search_text}%"),
             models.Seller.notes.ilike(f"%{search_text}%"),
         ))
 
-    return _dbq.offset(skip).limit(limit).all()
+    return _stmt.order_by(models.Seller.seller_id).offset(skip).limit(limit)
 
 
-def update_seller_stats(db: Session, seller_id: int) -> models.Seller:
-    _trans = db.begin(nested=db.in_transaction())
-    try:
-        db_seller = get_seller_by_id(db, seller_id)
+def _count_seller_items_by(db: Session, column, ids: List[int]) -> dict:
+    # one grouped count for the whole list, instead of loading the seller items of every row
+    return dict(db.execute(
+        select(column, func.count(models.SellerItems.tid)).filter(column.in_(ids)).group_by(column)
+    ).all())
 
-        _results = db.query(
-            models.SellerItems
-        ).filter_by(
-            seller_id=seller_id
-        ).order_by(models.SellerItems.purchase_date).all()
 
-        db_seller.total_quantity_sold = sum([row.quantity for row in _results])
-        db_seller.total_amount_sold = sum([row.total_price for row in _results])
+def get_sellers_list(db: Session, skip: int = 0, limit: int = 1000, search_text: str = None, count_items: bool = False) -> List[models.Seller]:
+    sellers = list(db.scalars(_select_sellers(skip=skip, limit=limit, search_text=search_text)))
+    if count_items:
+        _totals = _count_seller_items_by(db, models.SellerItems.seller_id, [seller.seller_id for seller in sellers])
+        for seller in sellers:
+            seller.total_seller_items = _totals.get(seller.seller_id, 0)
+    return sellers
 
-        _trans.session.add(db_seller)
-        _trans.commit()
-    except:
-        _trans.rollback()
-        raise
 
-    db.refresh(db_seller)
-    return db_seller
+async def get_sellers_list_async(adb: AsyncSession, skip: int = 0, limit: int = 1000, search_text: str = None) -> List[models.Seller]:
+    return list(await adb.scalars(_select_sellers(skip=skip, limit=limit, search_text=search_text)))
+
 
+def _seller_view_options() -> list:
+    return [
+        selectinload(models.Seller.seller_items).joinedload(models.SellerItems.expense_account),
+        selectinload(models.Seller.seller_items).joinedload(models.SellerItems.item).joinedload(models.Item.category),
+    ]
 
-def get_seller_by_id(db: Session, seller_id: int) -> models.Seller:
-    db_seller = db.get(models.Seller, seller_id)
+
+def get_seller_by_id(db: Session, seller_id: int, options: list = None) -> models.Seller:
+    # populate_existing, so the loader options also apply to a seller already in the session
+    db_seller = db.get(models.Seller, seller_id, options=options, populate_existing=options is not None)
     if db_seller is None:
         raise NotFound404(f"Seller {seller_id} not found")
     return db_seller
 
 
 def get_seller(db: Session, seller_id: int) -> models.Seller:
-    return get_seller_by_id(db, seller_id)
+    return get_seller_by_id(db, seller_id, options=_seller_view_options())
 
 
 def update_seller(db: Session, db_seller: models.Seller, seller_update: schemas.SellerUpdate) -> models.Seller:
@@ -106,51 +111,48 @@ def create_expense_account(db: Session, expense_account_create: schemas.ExpenseA
     return db_expense_account
 
 
-def get_expense_accounts_list(db: Session, search_text: str, skip: int = 0, limit: int = 100) -> List[models.ExpenseAccount]:
-    _dbq = db.query(models.ExpenseAccount)
+def _select_expense_accounts(search_text: str, skip: int = 0, limit: int = 100) -> Select:
+    _stmt = select(models.ExpenseAccount)
 
     if search_text is not None:
-        _dbq = _dbq.filter(or_(
+        _stmt = _stmt.filter(or_(
             models.ExpenseAccount.name.ilike(f"%{search_text}%"),
             models.ExpenseAccount.notes.ilike(f"%{search_text}%"),
         ))
 
-    return _dbq.offset(skip).limit(limit).all()
+    return _stmt.order_by(models.ExpenseAccount.ea_id).offset(skip).limit(limit)
 
 
-def update_expense_account_stats(db: Session, ea_id: int) -> models.ExpenseAccount:
-    _trans = db.begin(nested=db.in_transaction())
-    try:
-        db_expense_account = get_expense_account_by_id(db, ea_id)
+def get_expense_accounts_list(db: Session, search_text: str, skip: int = 0, limit: int = 100, count_items: bool = False) -> List[models.ExpenseAccount]:
+    expense_accounts = list(db.scalars(_select_expense_accounts(search_text, skip=skip, limit=limit)))
+    if count_items:
+        _totals = _count_seller_items_by(db, models.SellerItems.ea_id, [ea.ea_id for ea in expense_accounts])
+        for ea in expense_accounts:
+            ea.total_seller_items = _totals.get(ea.ea_id, 0)
+    return expense_accounts
 
-        _results = db.query(
-            models.SellerItems
-        ).filter_by(
-            ea_id=ea_id
-        ).all()
 
-        db_expense_account.total_quantity_seller_sold = sum([row.quantity for row in _results])
-        db_expense_account.total_amount_seller_sold = sum([row.total_price for row in _results])
+async def get_expense_accounts_list_async(adb: AsyncSession, search_text: str, skip: int = 0, limit: int = 100) -> List[models.ExpenseAccount]:
+    return list(await adb.scalars(_select_expense_accounts(search_text, skip=skip, limit=limit)))
 
-        _trans.session.add(db_expense_account)
-        _trans.commit()
-    except:
-        _trans.rollback()
-        raise
 
-    db.refresh(db_expense_account)
-    return db_expense_account
+def _expense_account_view_options() -> list:
+    return [
+        selectinload(models.ExpenseAccount.seller_items).joinedload(models.SellerItems.seller),
+        selectinload(models.ExpenseAccount.seller_items).joinedload(models.SellerItems.item).joinedload(models.Item.category),
+    ]
 
 
-def get_expense_account_by_id(db: Session, ea_id: int) -> models.ExpenseAccount:
-    db_expense_account = db.get(models.ExpenseAccount, ea_id)
+def get_expense_account_by_id(db: Session, ea_id: int, options: list = None) -> models.ExpenseAccount:
+    # populate_existing, so the loader options also apply to an expense account already in the session
+    db_expense_account = db.get(models.ExpenseAccount, ea_id, options=options, populate_existing=options is not None)
     if db_expense_account is None:
         raise NotFound404(f"Expense Account {ea_id} not found")
     return db_expense_account
 
 
 def get_expense_account(db: Session, ea_id: int) -> models.ExpenseAccount:
-    return get_expense_account_by_id(db, ea_id)
+    return get_expense_account_by_id(db, ea_id, options=_expense_account_view_options())
 
 
 def update_expense_account(db: Session, db_expense_account: models.ExpenseAccount, expense_account_update: schemas.ExpenseAccountUpdate) -> models.ExpenseAccount:
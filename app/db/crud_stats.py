@@ -0,0 +1,425 @@
+import datetime
+import math
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from sqlalchemy import update, select, func, join, event, and_, true, delete, literal, tuple_, bindparam
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import logit
+from app.db import models
+from app.db.database import SessionLocal
+from app.utils import format_year_month
+
+# monthly_sales.kind: the model its entity_id is of
+MONTHLY_SALES_KINDS = {
+    "category": models.Category,
+    "item": models.Item,
+    "seller": models.Seller,
+    "ea": models.ExpenseAccount,
+}
+_MONTHLY_TOTALS = ("total_quantity_seller_sold", "total_amount_seller_sold", "total_quantity_member_sold", "total_amount_member_sold")
+
+# session.info key of the totals changed by the session's writes, applied once just before its commit
+_PENDING_TOTALS = "pending_totals"
+# data_versions.name bumped by every write to the member dues
+DUES_DATA_VERSION = "dues"
+# session.info key of the versions its commit bumped and the dues data it changed, for in-memory copies to follow
+_COMMITTED_CHANGES = "committed_changes"
+
+
+class _PendingTotals:
+
+    def __init__(self):
+        # (model, id): {total column: delta}
+        self.deltas: dict[tuple, Counter] = defaultdict(Counter)
+        # item_id: {category total column: delta}, the category is only looked up when applied
+        self.item_category_deltas: dict[int, Counter] = defaultdict(Counter)
+        # (kind, id, year_month): {monthly_sales total column: delta}
+        self.monthly_deltas: dict[tuple, Counter] = defaultdict(Counter)
+        # (item_id, year_month): {monthly_sales total column: delta} of the item's category
+        self.item_category_monthly_deltas: dict[tuple, Counter] = defaultdict(Counter)
+        # data_versions to bump, and those bumped by writes that aren't tracked below
+        self.data_versions: set[str] = set()
+        self.untracked_data_versions: set[str] = set()
+        # (member_id, year_month): the member due (amount, is_paid, is_member_active) after the writes
+        self.member_dues: dict[tuple, tuple] = {}
+        # member_id: name of the new and renamed members, and the new dues months
+        self.dues_members: dict[int, str] = {}
+        self.dues_months: set[str] = set()
+
+
+def _pending(db: Session) -> _PendingTotals:
+    if _PENDING_TOTALS not in db.info:
+        if not db.in_transaction():
+            # a rollback only reaches the listener below when there's a transaction to roll back
+            db.begin()
+        db.info[_PENDING_TOTALS] = _PendingTotals()
+    return db.info[_PENDING_TOTALS]
+
+
+def _add_to_totals(db: Session, model, entity_id: int, **deltas) -> None:
+    _pending(db).deltas[(model, entity_id)].update(deltas)
+
+
+def _add_to_monthly_sales(db: Session, kind: str, entity_id: int, year_month: str | None, **deltas) -> None:
+    if year_month is not None:
+        _pending(db).monthly_deltas[(kind, entity_id, year_month)].update(deltas)
+
+
+def _add_to_item_sales(db: Session, item_id: int, year_month: str | None, **deltas) -> None:
+    # the item and its category, totals and month
+    _add_to_totals(db, models.Item, item_id, **deltas)
+    _add_to_monthly_sales(db, "item", item_id, year_month, **deltas)
+    pending = _pending(db)
+    pending.item_category_deltas[item_id].update(deltas)
+    if year_month is not None:
+        pending.item_category_monthly_deltas[(item_id, year_month)].update(deltas)
+
+
+def bump_data_version(db: Session, name: str) -> None:
+    # changed in ways that aren't tracked, in-memory copies of the data are reloaded
+    pending = _pending(db)
+    pending.data_versions.add(name)
+    pending.untracked_data_versions.add(name)
+
+
+def add_dues_changes(db: Session, members: dict[int, str] = None, id_year_months: Iterable[str] = (),
+                     member_dues: Iterable[tuple] = ()) -> None:
+    # dues data written without change_member_due_totals: new or renamed members, new months, and the member dues
+    # (member_id, id_year_month, amount, is_paid, is_member_active) written set-based. With none, only the version of the dues advances
+    pending = _pending(db)
+    pending.data_versions.add(DUES_DATA_VERSION)
+    pending.dues_members.update(members or {})
+    pending.dues_months.update(id_year_months)
+    for member_id, id_year_month, *state in member_dues:
+        pending.member_dues[(member_id, id_year_month)] = tuple(state)
+
+
+def pop_committed_changes(db: Session) -> tuple[dict[str, int], tuple | None] | None:
+    # (the new version of each data_version bumped, the dues changes (members, months, member dues) or None when
+    # not all of them are known)
+    return db.info.pop(_COMMITTED_CHANGES, None)
+
+
+def get_data_version(db: Session, name: str) -> int:
+    return db.scalar(select(models.DataVersion.version).filter_by(name=name)) or 0
+
+
+def _year_month(purchase_date: datetime.date | None) -> str | None:
+    return format_year_month(purchase_date) if purchase_date else None
+
+
+def add_seller_item_totals(db: Session, seller_id: int, ea_id: int, item_id: int, quantity: int, total_price: float,
+                           purchase_date: datetime.date = None) -> None:
+    quantity, total_price = quantity or 0, total_price or 0.0
+    year_month = _year_month(purchase_date)
+    sold = {"total_quantity_seller_sold": quantity, "total_amount_seller_sold": total_price}
+    _add_to_totals(db, models.Seller, seller_id, total_quantity_sold=quantity, total_amount_sold=total_price)
+    _add_to_totals(db, models.ExpenseAccount, ea_id, **sold)
+    _add_to_item_sales(db, item_id, year_month, **sold)
+    _add_to_monthly_sales(db, "seller", seller_id, year_month, **sold)
+    _add_to_monthly_sales(db, "ea", ea_id, year_month, **sold)
+
+
+def add_member_item_totals(db: Session, member_id: int, item_id: int, quantity: int, total_price: float,
+                           purchase_date: datetime.date = None) -> None:
+    quantity, total_price = quantity or 0, total_price or 0.0
+    sold = {"total_quantity_member_sold": quantity, "total_amount_member_sold": total_price}
+    _add_to_totals(db, models.Member, member_id, total_quantity_bought=quantity, total_amount_bought=total_price)
+    _add_to_item_sales(db, item_id, _year_month(purchase_date), **sold)
+
+
+def member_due_state(mdp: models.MemberDuesPayment) -> tuple:
+    return mdp.amount, mdp.is_paid, mdp.is_member_active
+
+
+def _add_member_due(db: Session, member_id: int, id_year_month: str, state: tuple, sign: int) -> None:
+    amount, is_paid, is_member_active = state
+    pending = _pending(db)
+    pending.data_versions.add(DUES_DATA_VERSION)
+    pending.member_dues[(member_id, id_year_month)] = state if sign > 0 else None
+    # the dues of an inactive member don't count, neither as paid nor as missing
+    if not is_member_active:
+        return
+    paid_or_missing = "paid" if is_paid else "missing"
+    amount = (amount or 0.0) * sign
+    _add_to_totals(db, models.Member, member_id, **{f"total_months_{paid_or_missing}": sign, f"total_amount_{paid_or_missing}": amount})
+    _add_to_totals(db, models.DuesPayment, id_year_month, **{f"total_members_{paid_or_missing}": sign, f"total_amount_{paid_or_missing}": amount})
+
+
+def change_member_due_totals(db: Session, mdp: models.MemberDuesPayment, old_state: tuple = None) -> None:
+    # the member's and the month's totals follow the member due from old_state (None when new) to what it is now
+    if old_state is not None:
+        _add_member_due(db, mdp.member_id, mdp.id_year_month, old_state, -1)
+    _add_member_due(db, mdp.member_id, mdp.id_year_month, member_due_state(mdp), 1)
+
+
+def move_item_category_totals(db: Session, db_item: models.Item, old_category_id: int) -> None:
+    # the item keeps its totals, they just count for another category now
+    _item_totals = {
+        "total_quantity_seller_sold": db_item.total_quantity_seller_sold or 0,
+        "total_amount_seller_sold": db_item.total_amount_seller_sold or 0.0,
+        "total_quantity_member_sold": db_item.total_quantity_member_sold or 0,
+        "total_amount_member_sold": db_item.total_amount_member_sold or 0.0,
+    }
+    _add_to_totals(db, models.Category, old_category_id, **{name: -value for name, value in _item_totals.items()})
+    _add_to_totals(db, models.Category, db_item.category_id, **_item_totals)
+
+    # and so do its months
+    _item_months = select(models.MonthlySales.id_year_month, *[getattr(models.MonthlySales, name) for name in _MONTHLY_TOTALS]).filter_by(
+        kind="item", entity_id=db_item.item_id
+    )
+    for year_month, *values in db.execute(_item_months):
+        _month_totals = {name: value or 0 for name, value in zip(_MONTHLY_TOTALS, values)}
+        _add_to_monthly_sales(db, "category", old_category_id, year_month, **{name: -value for name, value in _month_totals.items()})
+        _add_to_monthly_sales(db, "category", db_item.category_id, year_month, **_month_totals)
+
+
+@event.listens_for(Session, "before_commit")
+def apply_pending_totals(db: Session) -> None:
+    pending: _PendingTotals = db.info.pop(_PENDING_TOTALS, None)
+    if pending is None:
+        return
+    # the item categories read rows this session may not have flushed yet
+    db.flush()
+
+    if pending.item_category_deltas:
+        _item_categories = dict(db.execute(
+            select(models.Item.item_id, models.Item.category_id).where(models.Item.item_id.in_(pending.item_category_deltas))
+        ).all())
+        for item_id, deltas in pending.item_category_deltas.items():
+            if item_id in _item_categories:
+                pending.deltas[(models.Category, _item_categories[item_id])].update(deltas)
+        for (item_id, year_month), deltas in pending.item_category_monthly_deltas.items():
+            if item_id in _item_categories:
+                pending.monthly_deltas[("category", _item_categories[item_id], year_month)].update(deltas)
+
+    # one executemany per table and set of totals changed
+    _updates = defaultdict(list)
+    for (model, entity_id), deltas in pending.deltas.items():
+        # moved and back again
+        if not any(deltas.values()):
+            continue
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        _updates[(model, tuple(sorted(deltas)))].append({"entity_id": entity_id, **{f"delta_{name}": delta for name, delta in deltas.items()}})
+    for (model, names), rows in _updates.items():
+        table, primary_key = model.__table__, _TOTALS[model][0].name
+        # incremented by the database, concurrent writers can't overwrite each other's totals
+        db.connection().execute(table.update().where(table.c[primary_key] == bindparam("entity_id")).values({
+            name: func.coalesce(table.c[name], 0) + bindparam(f"delta_{name}") for name in names
+        }), rows)
+
+    _monthly_rows = [
+        {"kind": kind, "entity_id": entity_id, "id_year_month": year_month, **{name: deltas[name] for name in _MONTHLY_TOTALS}}
+        for (kind, entity_id, year_month), deltas in pending.monthly_deltas.items()
+        if any(deltas.values())
+    ]
+    if _monthly_rows:
+        db.execute(_add_on_conflict(_insert_monthly_sales(db)), _monthly_rows)
+        # months left without sales, after a transaction moved to another month/entity. Every transaction has a quantity,
+        # the amounts can be left with a float rounding remainder
+        _ms = models.MonthlySales
+        db.execute(delete(_ms).where(
+            tuple_(_ms.kind, _ms.entity_id, _ms.id_year_month).in_([(r["kind"], r["entity_id"], r["id_year_month"]) for r in _monthly_rows]),
+            func.coalesce(_ms.total_quantity_seller_sold, 0) == 0,
+            func.coalesce(_ms.total_quantity_member_sold, 0) == 0,
+        ))
+
+    versions = {}
+    for name in pending.data_versions:
+        _stmt = _insert_of(db)(models.DataVersion).values(name=name, version=1)
+        versions[name] = db.execute(_stmt.on_conflict_do_update(
+            index_elements=["name"], set_={"version": models.DataVersion.version + 1}
+        ).returning(models.DataVersion.version)).scalar_one()
+    if versions:
+        dues_changes = None if DUES_DATA_VERSION in pending.untracked_data_versions else (
+            pending.dues_members, pending.dues_months, pending.member_dues
+        )
+        db.info[_COMMITTED_CHANGES] = (versions, dues_changes)
+
+
+def _insert_of(db: Session):
+    return sqlite_insert if db.get_bind().dialect.name == "sqlite" else postgresql_insert
+
+
+def _insert_monthly_sales(db: Session):
+    return _insert_of(db)(models.MonthlySales)
+
+
+def _add_on_conflict(_stmt):
+    # upsert, adding to the month's totals when the row already exists
+    return _stmt.on_conflict_do_update(
+        index_elements=["kind", "entity_id", "id_year_month"],
+        set_={name: func.coalesce(getattr(models.MonthlySales, name), 0) + getattr(_stmt.excluded, name) for name in _MONTHLY_TOTALS}
+    )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_totals(db: Session, _previous_transaction) -> None:
+    # also when nothing reached the database yet, so they can't leak into the session's next commit
+    db.info.pop(_PENDING_TOTALS, None)
+    db.info.pop(_COMMITTED_CHANGES, None)
+
+
+_seller_items_of_category = join(models.SellerItems, models.Item)
+_member_items_of_category = join(models.MemberItems, models.Item)
+_MDP = models.MemberDuesPayment
+_MDP_PAID_ACTIVE = and_(_MDP.is_paid == true(), _MDP.is_member_active == true())
+
+# model: (primary key, {total column: (rows it sums, key of the rows, aggregate)})
+_TOTALS = {
+    models.Seller: (models.Seller.seller_id, {
+        "total_quantity_sold": (models.SellerItems, models.SellerItems.seller_id, func.sum(models.SellerItems.quantity)),
+        "total_amount_sold": (models.SellerItems, models.SellerItems.seller_id, func.sum(models.SellerItems.total_price)),
+    }),
+    models.ExpenseAccount: (models.ExpenseAccount.ea_id, {
+        "total_quantity_seller_sold": (models.SellerItems, models.SellerItems.ea_id, func.sum(models.SellerItems.quantity)),
+        "total_amount_seller_sold": (models.SellerItems, models.SellerItems.ea_id, func.sum(models.SellerItems.total_price)),
+    }),
+    models.Member: (models.Member.member_id, {
+        "total_quantity_bought": (models.MemberItems, models.MemberItems.member_id, func.sum(models.MemberItems.quantity)),
+        "total_amount_bought": (models.MemberItems, models.MemberItems.member_id, func.sum(models.MemberItems.total_price)),
+        "total_months_paid": (_MDP, _MDP.member_id, func.count().filter(_MDP_PAID_ACTIVE)),
+        "total_amount_paid": (_MDP, _MDP.member_id, func.sum(_MDP.amount).filter(_MDP_PAID_ACTIVE)),
+        "total_months_missing": (_MDP, _MDP.member_id, func.count().filter(models.MDP_UNPAID_ACTIVE)),
+        "total_amount_missing": (_MDP, _MDP.member_id, func.sum(_MDP.amount).filter(models.MDP_UNPAID_ACTIVE)),
+    }),
+    models.DuesPayment: (models.DuesPayment.id_year_month, {
+        "total_members_paid": (_MDP, _MDP.id_year_month, func.count().filter(_MDP_PAID_ACTIVE)),
+        "total_amount_paid": (_MDP, _MDP.id_year_month, func.sum(_MDP.amount).filter(_MDP_PAID_ACTIVE)),
+        "total_members_missing": (_MDP, _MDP.id_year_month, func.count().filter(models.MDP_UNPAID_ACTIVE)),
+        "total_amount_missing": (_MDP, _MDP.id_year_month, func.sum(_MDP.amount).filter(models.MDP_UNPAID_ACTIVE)),
+    }),
+    models.Item: (models.Item.item_id, {
+        "total_quantity_seller_sold": (models.SellerItems, models.SellerItems.item_id, func.sum(models.SellerItems.quantity)),
+        "total_amount_seller_sold": (models.SellerItems, models.SellerItems.item_id, func.sum(models.SellerItems.total_price)),
+        "total_quantity_member_sold": (models.MemberItems, models.MemberItems.item_id, func.sum(models.MemberItems.quantity)),
+        "total_amount_member_sold": (models.MemberItems, models.MemberItems.item_id, func.sum(models.MemberItems.total_price)),
+    }),
+    models.Category: (models.Category.category_id, {
+        "total_quantity_seller_sold": (_seller_items_of_category, models.Item.category_id, func.sum(models.SellerItems.quantity)),
+        "total_amount_seller_sold": (_seller_items_of_category, models.Item.category_id, func.sum(models.SellerItems.total_price)),
+        "total_quantity_member_sold": (_member_items_of_category, models.Item.category_id, func.sum(models.MemberItems.quantity)),
+        "total_amount_member_sold": (_member_items_of_category, models.Item.category_id, func.sum(models.MemberItems.total_price)),
+    }),
+}
+
+
+def recompute_totals(db: Session, model, ids: Iterable[int] = None) -> None:
+    # one UPDATE for all the entities (all of them when ids is None), summed by the database row by row
+    primary_key, totals = _TOTALS[model]
+    values = {
+        name: select(func.coalesce(aggregate, 0)).select_from(source).where(key == primary_key).scalar_subquery()
+        for name, (source, key, aggregate) in totals.items()
+    }
+    _stmt = update(model).values(values).execution_options(synchronize_session=False)
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return
+        _stmt = _stmt.where(primary_key.in_(ids))
+    db.execute(_stmt)
+
+
+def recompute_all_totals(db: Session) -> None:
+    # categories are summed from the transactions too, so the order doesn't matter
+    for model in _TOTALS:
+        recompute_totals(db, model)
+
+
+def get_totals_models() -> list:
+    return list(_TOTALS)
+
+
+def get_primary_key(model):
+    return _TOTALS[model][0]
+
+
+def find_drifted_totals(db: Session, model, first_id: int, last_id: int) -> dict[int, dict[str, tuple]]:
+    # {id: {total column: (stored, expected)}} of the entities between first_id and last_id whose totals are wrong
+    primary_key, totals = _TOTALS[model]
+    names = list(totals)
+    expected = defaultdict(lambda: [0] * len(names))
+
+    # one grouped aggregate per table summed, for all its totals
+    by_source = defaultdict(list)
+    for index, (source, key, aggregate) in enumerate(totals.values()):
+        by_source[(source, key)].append((index, aggregate))
+    for (source, key), aggregates in by_source.items():
+        _stmt = select(key, *[aggregate for _, aggregate in aggregates]).select_from(source).where(
+            key.between(first_id, last_id)
+        ).group_by(key)
+        for entity_id, *values in db.execute(_stmt):
+            for (index, _), value in zip(aggregates, values):
+                expected[entity_id][index] = value or 0
+
+    drifted = {}
+    _stored = select(primary_key, *[getattr(model, name) for name in names]).where(primary_key.between(first_id, last_id))
+    for entity_id, *stored in db.execute(_stored):
+        diff = {
+            name: (value, expected[entity_id][index])
+            for index, (name, value) in enumerate(zip(names, stored))
+            if value is None or not math.isclose(value, expected[entity_id][index], rel_tol=1e-9, abs_tol=1e-6)
+        }
+        if diff:
+            drifted[entity_id] = diff
+    return drifted
+
+
+# (kind, key of the rows, rows, item transactions model, "seller"/"member" totals)
+_MONTHLY_SALES_SOURCES = [
+    ("category", models.Item.category_id, _seller_items_of_category, models.SellerItems, "seller"),
+    ("category", models.Item.category_id, _member_items_of_category, models.MemberItems, "member"),
+    ("item", models.SellerItems.item_id, models.SellerItems, models.SellerItems, "seller"),
+    ("item", models.MemberItems.item_id, models.MemberItems, models.MemberItems, "member"),
+    ("seller", models.SellerItems.seller_id, models.SellerItems, models.SellerItems, "seller"),
+    ("ea", models.SellerItems.ea_id, models.SellerItems, models.SellerItems, "seller"),
+]
+
+
+def _year_month_of(db: Session, column):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m", column)
+    return func.to_char(column, "YYYY-MM")
+
+
+def rebuild_monthly_sales(db: Session) -> None:
+    # INSERT ... SELECT ... GROUP BY, the transactions never leave the database
+    db.execute(delete(models.MonthlySales))
+    for kind, key, source, transactions, sold_to in _MONTHLY_SALES_SOURCES:
+        year_month = _year_month_of(db, transactions.purchase_date)
+        sums = {
+            f"total_quantity_{sold_to}_sold": func.sum(transactions.quantity),
+            f"total_amount_{sold_to}_sold": func.sum(transactions.total_price),
+        }
+        _select = select(
+            literal(kind), key, year_month, *[sums.get(name, literal(0)) for name in _MONTHLY_TOTALS]
+        ).select_from(source).where(transactions.purchase_date.is_not(None)).group_by(key, year_month)
+        _stmt = _insert_monthly_sales(db).from_select(["kind", "entity_id", "id_year_month", *_MONTHLY_TOTALS], _select)
+        db.execute(_add_on_conflict(_stmt))
+
+
+def rebuild_all_stats(db: Session) -> None:
+    recompute_all_totals(db)
+    rebuild_monthly_sales(db)
+    bump_data_version(db, DUES_DATA_VERSION)
+
+
+def backfill_stats() -> None:
+    # databases from before the stored stats get them filled once, at startup
+    with SessionLocal() as db:
+        if db.scalar(select(models.DuesPayment.id_year_month).where(models.DuesPayment.total_members_paid.is_(None)).limit(1)):
+            recompute_totals(db, models.DuesPayment)
+            db.commit()
+            logit("Filled the dues_payments stats")
+
+        if db.scalar(select(models.MonthlySales.kind).limit(1)) is not None:
+            return
+        if db.scalar(select(models.SellerItems.tid).limit(1)) is None and db.scalar(select(models.MemberItems.tid).limit(1)) is None:
+            return
+        rebuild_monthly_sales(db)
+        db.commit()
+        logit(f"Filled monthly_sales with {db.scalar(select(func.count()).select_from(models.MonthlySales))} rows")
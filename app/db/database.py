@@ -1,25 +1,150 @@
+import os
+
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
-DATABASE_URL = "sqlite:///data/data.spsql"  # TODO Use Docker volume for this path
+from app import NAME
+from app.db import sqlite_profile, migrations
+from app.utils.scheduler import PeriodicTask
+
+DATABASE_URL = os.getenv("CDC_DATABASE_URL", "sqlite:///data/data.spsql")  # TODO Use Docker volume for this path
+# reports and async reads, a replica url or the same database opened read-only
+DATABASE_READ_URL = os.getenv("CDC_DATABASE_READ_URL", "")
+
+# connection pool, one connection is checked out per request for the lifetime of its session
+_POOL_DEFAULTS = {
+    # sqlite: one process, a bigger pool only costs file handles
+    "sqlite": {"pool_size": 10, "max_overflow": 20},
+    # server databases: pool_size * workers must stay below max_connections
+    "postgresql": {"pool_size": 5, "max_overflow": 10},
+}
+
+
+# drivers used by the async engine, same database as the sync one
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def is_sqlite(url: str | URL) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def read_only_url(url: str | URL) -> URL:
+    url = make_url(url)
+    if is_sqlite(url) and url.database and url.database != ":memory:":
+        return url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"})
+    return url
+
+
+def engine_options(url: str | URL, read_only: bool = False) -> dict:
+    backend = make_url(url).get_backend_name()
+    defaults = _POOL_DEFAULTS.get(backend, _POOL_DEFAULTS["postgresql"])
+    options = {
+        "pool_size": int(os.getenv("CDC_DB_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(os.getenv("CDC_DB_POOL_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_timeout": int(os.getenv("CDC_DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("CDC_DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+        "echo": False,
+    }
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # reuse the most recent connections, so idle ones above pool_size can be recycled by the server
+        options["pool_use_lifo"] = True
+        options["connect_args"] = {"application_name": NAME}
+        if read_only:
+            options["connect_args"]["options"] = "-c default_transaction_read_only=on"
+    return options
+
+
+def async_url(url: str | URL) -> URL:
+    url = make_url(url)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def async_engine_options(url: str | URL, read_only: bool = False) -> dict:
+    options = engine_options(url, read_only=read_only)
+    if is_sqlite(url):
+        options.pop("connect_args")
+    else:
+        server_settings = {"application_name": NAME}
+        if read_only:
+            server_settings["default_transaction_read_only"] = "on"
+        options["connect_args"] = {"server_settings": server_settings}
+    return options
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+_maintenance: PeriodicTask | None = None
+if is_sqlite(DATABASE_URL):
+    sqlite_profile.apply_profile(engine)
+    _maintenance = sqlite_profile.make_maintenance_task(engine)
+
+# read-only engine with its own pool, long reports never wait for (or lock out) the writers' connections
+_read_url = make_url(DATABASE_READ_URL) if DATABASE_READ_URL else read_only_url(DATABASE_URL)
+read_engine = create_engine(_read_url, **engine_options(_read_url, read_only=True))
+if is_sqlite(_read_url):
+    sqlite_profile.apply_profile(read_engine, read_only=True)
+
+# async engine for read paths served by async routes, so slow queries don't block the event loop
+async_engine = create_async_engine(async_url(_read_url), **async_engine_options(_read_url, read_only=True))
+if is_sqlite(_read_url):
+    sqlite_profile.apply_profile(async_engine.sync_engine, read_only=True)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, echo=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=True, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=True, bind=read_engine)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
 Base = declarative_base()
-_db = SessionLocal()
+# in tests a lazy load raises, so every query has to say how it loads the relationships it uses
+RELATIONSHIP_LOADING = "raise_on_sql" if os.getenv("CDC_MODE") == "TEST" else "select"
 
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrations.migrate_db(engine, Base.metadata)
+    if _maintenance:
+        _maintenance.start()
+
+
+def close_db():
+    if _maintenance:
+        _maintenance.stop()
+    read_engine.dispose()
+    engine.dispose()
+
+
+async def close_async_db():
+    await async_engine.dispose()
 
 
 def get_db():
+    # one session per request, so each request has its own identity map and pooled connection
+    db = SessionLocal()
     try:
-        yield _db
+        yield db
     finally:
-        _db.close_all()
+        db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as adb:
+        yield adb
 
 
 DB_SESSION: Session = Depends(get_db)
+READ_DB_SESSION: Session = Depends(get_read_db)
+ASYNC_DB_SESSION: AsyncSession = Depends(get_async_db)
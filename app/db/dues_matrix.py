@@ -0,0 +1,228 @@
+import bisect
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import logit
+from app.db import models, crud_stats
+from app.db.database import SessionLocal
+from app.utils import get_now
+
+# DuesMatrix.flags bits of each member x month
+DUE = 1
+PAID = 2
+ACTIVE = 4
+_MISSING = DUE | ACTIVE
+_PAID_ACTIVE = DUE | PAID | ACTIVE
+
+
+class DuesMatrix:
+    # every member due, as members x months arrays of amounts and flags, at one dues data version
+
+    def __init__(self, version: int, member_ids: np.ndarray, names: np.ndarray, months: list[str],
+                 amounts: np.ndarray, flags: np.ndarray, member_index: dict = None, month_index: dict = None):
+        self.version = version
+        self.member_ids = member_ids
+        self.names = names
+        self.months = months
+        self.amounts = amounts
+        self.flags = flags
+        self.member_index = member_index or {member_id: row for row, member_id in enumerate(member_ids.tolist())}
+        self.month_index = month_index or {id_year_month: col for col, id_year_month in enumerate(months)}
+
+    def copy(self, version: int, members: dict[int, str] = None, months: Iterable[str] = ()) -> "DuesMatrix":
+        # with the new members as rows, the new months as columns (both kept sorted) and the renamed members' names
+        members = members or {}
+        new_ids = sorted(member_id for member_id in members if member_id not in self.member_index)
+        new_months = sorted(set(months).difference(self.month_index))
+        names = self.names
+        if any(member_id in self.member_index for member_id in members):
+            names = names.copy()
+            for member_id, name in members.items():
+                if member_id in self.member_index:
+                    names[self.member_index[member_id]] = name
+        if not new_ids and not new_months:
+            # same members and months, so the indexes are shared
+            return DuesMatrix(version, self.member_ids, names, self.months, self.amounts.copy(), self.flags.copy(),
+                              self.member_index, self.month_index)
+
+        member_ids = np.concatenate([self.member_ids, np.array(new_ids, dtype=np.int64)])
+        names = np.concatenate([names, np.array([members[member_id] for member_id in new_ids], dtype=object)])
+        rows = np.argsort(member_ids, kind="stable")
+        all_months = sorted(self.months + new_months)
+        cols = np.searchsorted(all_months, self.months)
+        amounts = np.zeros((len(member_ids), len(all_months)))
+        flags = np.zeros((len(member_ids), len(all_months)), dtype=np.int8)
+        amounts[:len(self.member_ids), cols] = self.amounts
+        flags[:len(self.member_ids), cols] = self.flags
+        return DuesMatrix(version, member_ids[rows], names[rows], all_months, amounts[rows], flags[rows])
+
+    def set_due(self, member_id: int, id_year_month: str, state: tuple | None) -> bool:
+        row, col = self.member_index.get(member_id), self.month_index.get(id_year_month)
+        if row is None or col is None:
+            return False
+        if state is None:
+            self.amounts[row, col], self.flags[row, col] = 0.0, 0
+        else:
+            amount, is_paid, is_member_active = state
+            self.amounts[row, col] = amount or 0.0
+            self.flags[row, col] = DUE | (PAID if is_paid else 0) | (ACTIVE if is_member_active else 0)
+        return True
+
+    def get_months_between(self, since: str = None, until: str = None) -> list[str]:
+        first = bisect.bisect_left(self.months, since) if since else 0
+        last = bisect.bisect_right(self.months, until) if until else len(self.months)
+        return self.months[first:last]
+
+    def get_member_missing(self, member_id: int, until: str) -> tuple[list[str], float]:
+        row = self.member_index.get(member_id)
+        if row is None:
+            return [], 0.0
+        last = bisect.bisect_right(self.months, until)
+        missing = self.flags[row, :last] == _MISSING
+        return [self.months[col] for col in np.flatnonzero(missing)], float(self.amounts[row, :last][missing].sum())
+
+    def get_pivot(self, months: list[str]) -> tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # members with any paid/missing due (of all months), and the paid/missing amounts of the months
+        cols = [self.month_index[id_year_month] for id_year_month in months]
+        flags, amounts = self.flags[:, cols], self.amounts[:, cols]
+        members = pd.DataFrame({"ID": self.member_ids, "Nome": self.names})
+        return (
+            members,
+            (self.flags == _PAID_ACTIVE).any(axis=1),
+            (self.flags == _MISSING).any(axis=1),
+            np.where(flags == _PAID_ACTIVE, amounts, 0.0),
+            np.where(flags == _MISSING, amounts, 0.0),
+        )
+
+    def get_member_dues(self, member_id: int) -> list[dict]:
+        row = self.member_index.get(member_id)
+        if row is None:
+            return []
+        return [
+            {
+                "member_id": member_id,
+                "id_year_month": id_year_month,
+                "amount": float(self.amounts[row, col]),
+                "is_paid": bool(self.flags[row, col] & PAID),
+                "is_member_active": bool(self.flags[row, col] & ACTIVE),
+            }
+            for col, id_year_month in enumerate(self.months)
+            if self.flags[row, col] & DUE
+        ]
+
+    def get_months_amount(self) -> pd.Series:
+        return pd.Series(self.amounts.sum(axis=0), index=self.months)
+
+
+def build_dues_matrix(db: Session) -> DuesMatrix:
+    # the version first, rows committed after it only make the matrix look older than it is
+    version = crud_stats.get_data_version(db, crud_stats.DUES_DATA_VERSION)
+    members = db.execute(select(models.Member.member_id, models.Member.name).order_by(models.Member.member_id)).all()
+    months = list(db.scalars(select(models.DuesPayment.id_year_month).order_by(models.DuesPayment.id_year_month)))
+    _mdp = models.MemberDuesPayment
+    dues = pd.DataFrame(db.connection().execute(select(
+        _mdp.member_id, _mdp.id_year_month, _mdp.amount, _mdp.is_paid, _mdp.is_member_active
+    )).all(), columns=["member_id", "id_year_month", "amount", "is_paid", "is_member_active"])
+
+    member_ids = np.array([member_id for member_id, _ in members], dtype=np.int64)
+    names = np.array([name for _, name in members], dtype=object)
+    amounts = np.zeros((len(member_ids), len(months)))
+    flags = np.zeros((len(member_ids), len(months)), dtype=np.int8)
+
+    dues = dues[dues["id_year_month"].isin(months) & dues["member_id"].isin(member_ids)]
+    rows = np.searchsorted(member_ids, dues["member_id"].to_numpy(dtype=np.int64))
+    cols = pd.Categorical(dues["id_year_month"], categories=months).codes
+    amounts[rows, cols] = dues["amount"].to_numpy(dtype=float, na_value=0.0)
+    flags[rows, cols] = DUE | np.where(dues["is_paid"].eq(True), PAID, 0) | np.where(dues["is_member_active"].eq(True), ACTIVE, 0)
+
+    return DuesMatrix(version, member_ids, names, months, amounts, flags)
+
+
+class SharedDuesMatrix:
+    # built at startup, followed by this worker's dues writes (new members, months and renames included), and rebuilt
+    # when another worker's write or an untracked one bumps the version
+
+    def __init__(self):
+        self.builds = 0
+        self.updates = 0
+        self.last_build = None
+        self.last_build_time = 0.0
+        self.__matrix: DuesMatrix | None = None
+        self.__lock = threading.Lock()
+
+    @property
+    def matrix(self) -> DuesMatrix | None:
+        return self.__matrix
+
+    def load(self, version: int = None) -> DuesMatrix:
+        with SessionLocal() as db:
+            return self._build(db, version)
+
+    def get(self, db: Session) -> DuesMatrix:
+        version = crud_stats.get_data_version(db, crud_stats.DUES_DATA_VERSION)
+        matrix = self.__matrix
+        # newer is fine too, a read replica may not have the last writes yet
+        if matrix is not None and matrix.version >= version:
+            return matrix
+        return self._build(db, version)
+
+    async def get_async(self, adb: AsyncSession) -> DuesMatrix:
+        version = await adb.scalar(select(models.DataVersion.version).filter_by(name=crud_stats.DUES_DATA_VERSION)) or 0
+        matrix = self.__matrix
+        if matrix is not None and matrix.version >= version:
+            return matrix
+        return await run_in_threadpool(self.load, version)
+
+    def _build(self, db: Session, version: int = None) -> DuesMatrix:
+        with self.__lock:
+            # already built by another request while this one waited
+            matrix = self.__matrix
+            if version is not None and matrix is not None and matrix.version >= version:
+                return matrix
+            start = time.perf_counter()
+            matrix = build_dues_matrix(db)
+            self.__matrix = matrix
+            self.builds += 1
+            self.last_build, self.last_build_time = get_now(), time.perf_counter() - start
+        logit(f"Dues matrix {len(matrix.member_ids)}x{len(matrix.months)} built at version {matrix.version} in {self.last_build_time:.2f}s")
+        return matrix
+
+    def apply(self, version: int, changes: tuple | None):
+        with self.__lock:
+            matrix = self.__matrix
+            if matrix is None or matrix.version >= version:
+                return
+            # only the very next version can be applied, any other write in between is only in the database
+            if changes is None or matrix.version != version - 1:
+                self.__matrix = None
+                return
+            members, months, member_dues = changes
+            # on a copy, readers keep the matrix they got until all the changes are in
+            matrix = matrix.copy(version, members, months)
+            for (member_id, id_year_month), state in member_dues.items():
+                if not matrix.set_due(member_id, id_year_month, state):
+                    self.__matrix = None
+                    return
+            self.__matrix = matrix
+            self.updates += 1
+
+
+dues_matrix = SharedDuesMatrix()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_dues(db: Session) -> None:
+    changes = crud_stats.pop_committed_changes(db)
+    if changes is None:
+        return
+    versions, dues_changes = changes
+    if crud_stats.DUES_DATA_VERSION in versions:
+        dues_matrix.apply(versions[crud_stats.DUES_DATA_VERSION], dues_changes)
@@ -0,0 +1,42 @@
+from sqlalchemy import Engine, inspect, text, MetaData
+
+from app import logit
+
+# indexes replaced by the composite ones in the models, dropped from existing databases
+_OBSOLETE_INDEXES = {
+    "seller_items": ["ix_seller_items_seller_id", "ix_seller_items_item_id", "ix_seller_items_ea_id"],
+    "member_items": ["ix_member_items_member_id", "ix_member_items_item_id"],
+}
+
+
+def migrate_db(engine: Engine, metadata: MetaData) -> None:
+    # create_all() only creates missing tables, bring the existing ones up to the models
+    _inspector = inspect(engine)
+    _tables = set(_inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in _tables:
+                continue
+            existing = {column["name"] for column in _inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    # added empty, the stats columns are filled by crud_stats.backfill_stats()
+                    logit(f"Adding column {column.name} to {table.name}")
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"))
+
+        for table_name, index_names in _OBSOLETE_INDEXES.items():
+            if table_name not in _tables:
+                continue
+            existing = {ix["name"] for ix in _inspector.get_indexes(table_name)}
+            for index_name in index_names:
+                if index_name in existing:
+                    logit(f"Dropping index {index_name}")
+                    conn.execute(text(f"DROP INDEX {index_name}"))
+
+        for table in metadata.sorted_tables:
+            existing = {ix["name"] for ix in _inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    logit(f"Creating index {index.name} on {table.name}")
+                    index.create(bind=conn)
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, String, DateTime
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class Category(Base):
@@ -17,5 +17,5 @@ class Category(Base):
     total_amount_member_sold = Column(Float, default=0.0)
     total_quantity_member_sold = Column(Integer, default=0)
 
-    items = relationship("Item", back_populates="category")
+    items = relationship("Item", back_populates="category", lazy=RELATIONSHIP_LOADING)
 
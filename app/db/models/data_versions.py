@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.database import Base
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    # bumped in the same transaction as the writes it covers, so every worker can tell its caches are stale
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Float
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class DuesPayment(Base):
@@ -12,4 +12,9 @@ class DuesPayment(Base):
     year = Column(Integer, index=True)
     month = Column(Integer, index=True)
 
-    member_due_payment = relationship("MemberDuesPayment", back_populates="dues_payment")
+    total_amount_paid = Column(Float, default=0.0)
+    total_members_paid = Column(Integer, default=0)
+    total_amount_missing = Column(Float, default=0.0)
+    total_members_missing = Column(Integer, default=0)
+
+    member_due_payment = relationship("MemberDuesPayment", back_populates="dues_payment", lazy=RELATIONSHIP_LOADING)
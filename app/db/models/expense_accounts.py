@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, String, DateTime
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class ExpenseAccount(Base):
@@ -15,4 +15,4 @@ class ExpenseAccount(Base):
     total_amount_seller_sold = Column(Float, default=0.0)
     total_quantity_seller_sold = Column(Integer, default=0)
 
-    seller_items = relationship("SellerItems", back_populates="expense_account")
+    seller_items = relationship("SellerItems", back_populates="expense_account", lazy=RELATIONSHIP_LOADING)
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, String, ForeignKey, UniqueConstraint, DateTime
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class Item(Base):
@@ -21,6 +21,6 @@ class Item(Base):
     total_amount_member_sold = Column(Float, default=0.0)
     total_quantity_member_sold = Column(Integer, default=0)
 
-    category = relationship("Category", back_populates="items")
-    seller_items = relationship("SellerItems", back_populates="item")
-    member_items = relationship("MemberItems", back_populates="item")
+    category = relationship("Category", back_populates="items", lazy=RELATIONSHIP_LOADING)
+    seller_items = relationship("SellerItems", back_populates="item", lazy=RELATIONSHIP_LOADING)
+    member_items = relationship("MemberItems", back_populates="item", lazy=RELATIONSHIP_LOADING)
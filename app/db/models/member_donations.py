@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, Boolean
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class MemberDonation(Base):
@@ -14,4 +14,4 @@ class MemberDonation(Base):
     pay_date = Column(Date)
     pay_update_time = Column(DateTime)
 
-    member = relationship("Member", back_populates="member_donations")
+    member = relationship("Member", back_populates="member_donations", lazy=RELATIONSHIP_LOADING)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, Float, String, Boolean, ForeignKey, UniqueConstraint, DateTime, Date
+from sqlalchemy import Column, Integer, Float, String, Boolean, ForeignKey, UniqueConstraint, DateTime, Date, Index, \
+    and_, true, false
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class MemberDuesPayment(Base):
@@ -18,5 +19,24 @@ class MemberDuesPayment(Base):
     pay_date = Column(Date)
     pay_update_time = Column(DateTime)
 
-    dues_payment = relationship("DuesPayment", back_populates="member_due_payment")
-    member = relationship("Member", back_populates="member_due_payment")
+    dues_payment = relationship("DuesPayment", back_populates="member_due_payment", lazy=RELATIONSHIP_LOADING)
+    member = relationship("Member", back_populates="member_due_payment", lazy=RELATIONSHIP_LOADING)
+
+
+# unpaid dues of active members, a small slice of the table that only grows with arrears.
+# Queries must use this same predicate (literals, not bound parameters) for the partial indexes to be picked,
+# the predicate columns are included so SQLite can answer from the index alone.
+MDP_UNPAID_ACTIVE = and_(MemberDuesPayment.is_paid == false(), MemberDuesPayment.is_member_active == true())
+
+Index(
+    "ix_member_dues_payments_unpaid_member",
+    MemberDuesPayment.member_id, MemberDuesPayment.id_year_month, MemberDuesPayment.amount,
+    MemberDuesPayment.is_paid, MemberDuesPayment.is_member_active,
+    sqlite_where=MDP_UNPAID_ACTIVE, postgresql_where=MDP_UNPAID_ACTIVE,
+)
+Index(
+    "ix_member_dues_payments_unpaid_month",
+    MemberDuesPayment.id_year_month, MemberDuesPayment.amount,
+    MemberDuesPayment.is_paid, MemberDuesPayment.is_member_active,
+    sqlite_where=MDP_UNPAID_ACTIVE, postgresql_where=MDP_UNPAID_ACTIVE,
+)
@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, DateTime, Boolean
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class MemberItems(Base):
     __tablename__ = "member_items"
+    # same access patterns as seller_items
+    __table_args__ = (
+        Index("ix_member_items_item_date", "item_id", "purchase_date", "quantity", "total_price"),
+        Index("ix_member_items_member_date", "member_id", "purchase_date", "quantity", "total_price"),
+        Index("ix_member_items_purchase_date", "purchase_date"),
+    )
     tid = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
-    member_id = Column(Integer, ForeignKey(column="members.member_id", onupdate="CASCADE", ondelete="CASCADE"), index=True)
-    item_id = Column(Integer, ForeignKey(column="items.item_id", onupdate="CASCADE", ondelete="CASCADE"), index=True)
+    member_id = Column(Integer, ForeignKey(column="members.member_id", onupdate="CASCADE", ondelete="CASCADE"))
+    item_id = Column(Integer, ForeignKey(column="items.item_id", onupdate="CASCADE", ondelete="CASCADE"))
 
     quantity = Column(Integer)
     total_price = Column(Float)
@@ -18,5 +24,5 @@ class MemberItems(Base):
     is_cash = Column(Boolean)
     row_update_time = Column(DateTime)
 
-    member = relationship("Member", back_populates="member_items")
-    item = relationship("Item", back_populates="member_items")
+    member = relationship("Member", back_populates="member_items", lazy=RELATIONSHIP_LOADING)
+    item = relationship("Item", back_populates="member_items", lazy=RELATIONSHIP_LOADING)
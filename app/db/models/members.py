@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, Boolean, String, ForeignKey, Date, DateTime
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class MemberAbs(Base):
@@ -29,10 +29,10 @@ class Member(MemberAbs):
     __tablename__ = "members"
     member_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
-    member_history = relationship("MemberHistory", back_populates="member")
-    member_due_payment = relationship("MemberDuesPayment", back_populates="member")
-    member_donations = relationship("MemberDonation", back_populates="member")
-    member_items = relationship("MemberItems", back_populates="member")
+    member_history = relationship("MemberHistory", back_populates="member", lazy=RELATIONSHIP_LOADING)
+    member_due_payment = relationship("MemberDuesPayment", back_populates="member", lazy=RELATIONSHIP_LOADING)
+    member_donations = relationship("MemberDonation", back_populates="member", lazy=RELATIONSHIP_LOADING)
+    member_items = relationship("MemberItems", back_populates="member", lazy=RELATIONSHIP_LOADING)
 
 
 class MemberHistory(MemberAbs):
@@ -43,4 +43,4 @@ class MemberHistory(MemberAbs):
     since = Column(String)
     date_time = Column(DateTime, index=True)
 
-    member = relationship("Member", back_populates="member_history")
+    member = relationship("Member", back_populates="member_history", lazy=RELATIONSHIP_LOADING)
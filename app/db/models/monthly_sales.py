@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, String, Index
+
+from app.db.database import Base
+
+
+class MonthlySales(Base):
+    __tablename__ = "monthly_sales"
+    # one row per (category/item/seller/ea, month), kept up to date by every seller/member item write
+    __table_args__ = (
+        Index("ix_monthly_sales_kind_month", "kind", "id_year_month"),
+    )
+    kind = Column(String, primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    id_year_month = Column(String, primary_key=True)
+
+    total_amount_seller_sold = Column(Float, default=0.0)
+    total_quantity_seller_sold = Column(Integer, default=0)
+    total_amount_member_sold = Column(Float, default=0.0)
+    total_quantity_member_sold = Column(Integer, default=0)
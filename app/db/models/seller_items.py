@@ -1,16 +1,24 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, DateTime, Boolean
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class SellerItems(Base):
     __tablename__ = "seller_items"
+    # (filter, purchase_date) serve the list filters with ORDER BY purchase_date DESC without a sort,
+    # quantity and total_price make them covering for the stats sums
+    __table_args__ = (
+        Index("ix_seller_items_item_date", "item_id", "purchase_date", "quantity", "total_price"),
+        Index("ix_seller_items_seller_date", "seller_id", "purchase_date", "quantity", "total_price"),
+        Index("ix_seller_items_ea_date", "ea_id", "purchase_date", "quantity", "total_price"),
+        Index("ix_seller_items_purchase_date", "purchase_date"),
+    )
     tid = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
-    seller_id = Column(Integer, ForeignKey(column="sellers.seller_id", onupdate="CASCADE", ondelete="CASCADE"), index=True)
-    item_id = Column(Integer, ForeignKey(column="items.item_id", onupdate="CASCADE", ondelete="CASCADE"), index=True)
-    ea_id = Column(Integer, ForeignKey(column="expense_accounts.ea_id", onupdate="CASCADE", ondelete="CASCADE"), index=True)
+    seller_id = Column(Integer, ForeignKey(column="sellers.seller_id", onupdate="CASCADE", ondelete="CASCADE"))
+    item_id = Column(Integer, ForeignKey(column="items.item_id", onupdate="CASCADE", ondelete="CASCADE"))
+    ea_id = Column(Integer, ForeignKey(column="expense_accounts.ea_id", onupdate="CASCADE", ondelete="CASCADE"))
 
     quantity = Column(Integer)
     total_price = Column(Float)
@@ -19,6 +27,6 @@ class SellerItems(Base):
     is_cash = Column(Boolean)
     row_update_time = Column(DateTime)
 
-    seller = relationship("Seller", back_populates="seller_items")
-    item = relationship("Item", back_populates="seller_items")
-    expense_account = relationship("ExpenseAccount", back_populates="seller_items")
+    seller = relationship("Seller", back_populates="seller_items", lazy=RELATIONSHIP_LOADING)
+    item = relationship("Item", back_populates="seller_items", lazy=RELATIONSHIP_LOADING)
+    expense_account = relationship("ExpenseAccount", back_populates="seller_items", lazy=RELATIONSHIP_LOADING)
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, Float, String, DateTime
 from sqlalchemy.orm import relationship
 
-from app.db.database import Base
+from app.db.database import Base, RELATIONSHIP_LOADING
 
 
 class Seller(Base):
@@ -17,4 +17,4 @@ class Seller(Base):
     total_amount_sold = Column(Float, default=0.0)
     total_quantity_sold = Column(Integer, default=0)
 
-    seller_items = relationship("SellerItems", back_populates="seller")
+    seller_items = relationship("SellerItems", back_populates="seller", lazy=RELATIONSHIP_LOADING)
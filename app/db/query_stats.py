@@ -0,0 +1,113 @@
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+
+from app import logit
+
+QUERY_STATS = os.getenv("CDC_DB_QUERY_STATS", "0") == "1"
+# the same statement this many times in one request is reported as a possible N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("CDC_DB_QUERY_REPEAT_THRESHOLD", "5"))
+
+_request_queries: ContextVar["RequestQueries | None"] = ContextVar("request_queries", default=None)
+
+
+class RequestQueries:
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def add(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+
+    def get_repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict[str, int]:
+        return {statement: total for statement, total in self.statements.items() if total >= threshold}
+
+    def as_dict(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict:
+        return {
+            "count": self.count,
+            "time": f"{self.total_time:.3f}",
+            "repeated": {_shorten(statement): total for statement, total in self.get_repeated(threshold).items()},
+        }
+
+
+def _shorten(statement: str, size: int = 80) -> str:
+    # keep the start and the end (where the filters are) of long statements
+    statement = " ".join(statement.split())
+    if len(statement) <= size * 2:
+        return statement
+    return f"{statement[:size]} ... {statement[-size:]}"
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        # enabled while this statement was running
+        return
+    duration = time.perf_counter() - start_times.pop()
+
+    request_queries = _request_queries.get()
+    if request_queries is not None:
+        request_queries.add(statement, duration)
+
+
+def _handle_error(context):
+    # failed statements skip after_cursor_execute, without this the next statement would be timed from their start
+    if context.connection is None:
+        return
+    start_times = context.connection.info.get("query_start_time")
+    if start_times:
+        start_times.pop()
+
+
+class QueryStats:
+
+    def __init__(self, enabled: bool = False, repeat_threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self.__enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if self.__enabled:
+            return
+        # listen on the Engine class, covers the write, read and async engines
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        self.__enabled = True
+        logit("DB query stats enabled")
+
+    def disable(self):
+        if not self.__enabled:
+            return
+        # remove the listeners, so there's no cost at all while disabled
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.remove(Engine, "handle_error", _handle_error)
+        self.__enabled = False
+        logit("DB query stats disabled")
+
+    def is_enabled(self) -> bool:
+        return self.__enabled
+
+    def start_request(self) -> RequestQueries | None:
+        if not self.__enabled:
+            return None
+        # every request runs in its own task (and context), the route's threadpool gets a copy of it
+        request_queries = RequestQueries()
+        _request_queries.set(request_queries)
+        return request_queries
+
+
+query_stats = QueryStats(enabled=QUERY_STATS)
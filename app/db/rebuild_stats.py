@@ -0,0 +1,27 @@
+import time
+
+from app import logit, logging
+from app.db import init_db, close_db, SessionLocal, crud_stats
+
+
+def rebuild_stats() -> None:
+    # every stored total and the monthly rollups, recomputed from the transactions
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        try:
+            crud_stats.rebuild_all_stats(db)
+            db.commit()
+        except:
+            db.rollback()
+            raise
+    logit(f"Stats rebuilt in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    # python -m app.db.rebuild_stats
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    init_db()
+    try:
+        rebuild_stats()
+    finally:
+        close_db()
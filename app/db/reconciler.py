@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+from sqlalchemy import select
+
+from app import logit, logging
+from app.db import crud_stats, models
+from app.db.database import SessionLocal
+from app.utils import get_now
+from app.utils.scheduler import PeriodicTask
+
+# seconds between the checks of the stored totals against the transactions, 0 disables it
+RECONCILE_INTERVAL = float(os.getenv("CDC_DB_RECONCILE_INTERVAL", "3600"))
+# entities checked (and repaired) per transaction, and the pause between them so foreground writes get the locks
+RECONCILE_CHUNK = int(os.getenv("CDC_DB_RECONCILE_CHUNK", "500"))
+RECONCILE_PAUSE = float(os.getenv("CDC_DB_RECONCILE_PAUSE", "0.2"))
+
+
+class StatsReconciler:
+
+    def __init__(self, interval: float = RECONCILE_INTERVAL, chunk_size: int = RECONCILE_CHUNK, pause: float = RECONCILE_PAUSE):
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.last_run = None
+        self.last_checked = 0
+        self.last_fixed: dict[str, int] = {}
+        self.__lock = threading.Lock()
+        self.__task = PeriodicTask("stats-reconciler", interval, self.run)
+
+    @property
+    def interval(self) -> float:
+        return self.__task.interval
+
+    def start(self):
+        self.__task.start()
+
+    def stop(self):
+        self.__task.stop()
+
+    def is_running(self) -> bool:
+        return self.__lock.locked()
+
+    def run_in_background(self):
+        self.__task.run_now()
+
+    def run(self) -> dict[str, int]:
+        # the periodic task and the admin page can't run it at the same time
+        if not self.__lock.acquire(blocking=False):
+            return {}
+        try:
+            return self._run()
+        finally:
+            self.__lock.release()
+
+    def _run(self) -> dict[str, int]:
+        start = time.perf_counter()
+        checked, fixed = 0, {}
+        for model in crud_stats.get_totals_models():
+            _checked, _fixed = self._reconcile_model(model)
+            checked += _checked
+            if _fixed:
+                fixed[model.__name__] = _fixed
+
+        self.last_run, self.last_checked, self.last_fixed = get_now(), checked, fixed
+        logit(f"Stats reconciliation checked={checked} {fixed=} in {time.perf_counter() - start:.1f}s",
+              level=logging.WARNING if fixed else logging.INFO)
+        return fixed
+
+    def _reconcile_model(self, model) -> tuple[int, int]:
+        primary_key = crud_stats.get_primary_key(model)
+        checked, fixed, last_id = 0, 0, None
+        while True:
+            with SessionLocal() as db:
+                _stmt = select(primary_key).order_by(primary_key).limit(self.chunk_size)
+                if last_id is not None:
+                    _stmt = _stmt.where(primary_key > last_id)
+                ids = list(db.scalars(_stmt))
+                if not ids:
+                    break
+
+                drifted = crud_stats.find_drifted_totals(db, model, ids[0], ids[-1])
+                if drifted:
+                    for entity_id, diff in drifted.items():
+                        logit(f"Stats drift {model.__name__}={entity_id} {diff}", level=logging.WARNING)
+                    # recomputed from the rows at repair time, not from the values compared above
+                    crud_stats.recompute_totals(db, model, drifted)
+                    if model in (models.DuesPayment, models.Member):
+                        # so the cached dues month stats are recomputed too
+                        crud_stats.bump_data_version(db, crud_stats.DUES_DATA_VERSION)
+                    db.commit()
+
+            checked += len(ids)
+            fixed += len(drifted)
+            last_id = ids[-1]
+            time.sleep(self.pause)
+        return checked, fixed
+
+
+stats_reconciler = StatsReconciler()
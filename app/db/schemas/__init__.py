@@ -1,10 +1,11 @@
 from app.db.schemas.categories import CategoryCreate, CategoryUpdate, CategoryView, Category
-from app.db.schemas.dues_payments import DuesPaymentCreate, DuesPaymentStats, DuesPaymentView, DuesPayment
+from app.db.schemas.dues_payments import DuesPaymentCreate, DuesPaymentRangeCreate, DuesPaymentStats, DuesPaymentView, DuesPayment
 from app.db.schemas.expense_accounts import ExpenseAccountCreate, ExpenseAccountUpdate, ExpenseAccountView, ExpenseAccount
 from app.db.schemas.items import ItemCreate, ItemUpdate, ItemView, Item
 from app.db.schemas.member_donations import MemberDonationCreate, MemberDonation
-from app.db.schemas.member_due_payment import MemberDuesPaymentCreate, MemberDuesPayment
+from app.db.schemas.member_due_payment import MemberDuesPaymentCreate, MemberDuesPaymentBulkPay, MemberDuesPayment
 from app.db.schemas.member_items import MemberItemsCreate, MemberItemsUpdate, MemberItems
 from app.db.schemas.members import MemberCreate, MemberUpdate, MemberUpdateActive, MemberUpdateAmount, MemberView, MemberHistory, Member
+from app.db.schemas.monthly_sales import MonthlySales
 from app.db.schemas.seller_items import SellerItemsCreate, SellerItemsUpdate, SellerItems
 from app.db.schemas.sellers import SellerCreate, SellerUpdate, SellerView, Seller
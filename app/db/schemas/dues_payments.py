@@ -3,7 +3,7 @@ from typing import Optional, List
 from pydantic import BaseModel, Field
 
 from app.db.schemas.member_due_payment import MemberDuesPayment
-from app.utils import date, format_year_month
+from app.utils import date, format_year_month, YEAR_MONTH_PATTERN
 
 
 class DuesPaymentBase(BaseModel):
@@ -14,6 +14,11 @@ class DuesPaymentCreate(DuesPaymentBase):
     pass
 
 
+class DuesPaymentRangeCreate(BaseModel):
+    since: str = Field(pattern=YEAR_MONTH_PATTERN, examples=["2024-01"])
+    until: str = Field(pattern=YEAR_MONTH_PATTERN, examples=["2024-12"])
+
+
 class DuesPayment(DuesPaymentBase):
     date_ym: Optional[date] = None
     year: Optional[int] = None
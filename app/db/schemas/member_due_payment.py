@@ -1,8 +1,8 @@
-from typing import Optional
+from typing import Optional, List
 
 from pydantic import BaseModel, Field
 
-from app.utils import datetime, date, get_today
+from app.utils import datetime, date, get_today, YEAR_MONTH_PATTERN
 
 
 class MemberDuesPaymentBase(BaseModel):
@@ -18,6 +18,13 @@ class MemberDuesPaymentCreate(BaseModel):
     pay_date: date = Field(default_factory=get_today)
 
 
+class MemberDuesPaymentBulkPay(MemberDuesPaymentCreate):
+    tids: Optional[List[int]] = Field(default=None)
+    member_id: Optional[int] = Field(default=None)
+    since: Optional[str] = Field(default=None, pattern=YEAR_MONTH_PATTERN, examples=["2024-01"])
+    until: Optional[str] = Field(default=None, pattern=YEAR_MONTH_PATTERN, examples=["2024-06"])
+
+
 class MemberDuesPayment(MemberDuesPaymentBase):
     tid: int
     member_id: int
@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class MonthlySales(BaseModel):
+    kind: str = Field(examples=["category"])
+    entity_id: int
+    name: Optional[str] = None
+    id_year_month: str = Field(examples=["2024-06"])
+
+    total_amount_seller_sold: Optional[float] = Field(default=0.0)
+    total_quantity_seller_sold: Optional[int] = Field(default=0)
+    total_amount_member_sold: Optional[float] = Field(default=0.0)
+    total_quantity_member_sold: Optional[int] = Field(default=0)
+
+    class Config:
+        orm_mode: True
@@ -0,0 +1,119 @@
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+import greenlet
+from sqlalchemy import Engine, event
+
+from app import NAME, logit, filename_from_root, get_caller_function
+
+# statements slower than this are logged with their plan, 0 disables it
+SLOW_QUERY_MS = float(os.getenv("CDC_DB_SLOW_QUERY_MS", "500"))
+SLOW_QUERY_FILENAME = filename_from_root("data/slow_queries.log")
+
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_CALLER_MODULES = ("app.db.crud_", "app.api.", "app.web.")
+
+slow_log = logging.getLogger(f"{NAME}.slow_queries")
+slow_log.propagate = False
+_handler = RotatingFileHandler(SLOW_QUERY_FILENAME, "a", 9_000_000, 2, delay=True)
+_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+slow_log.addHandler(_handler)
+slow_log.setLevel(logging.WARNING)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return ""
+    # straight on the DBAPI connection, so it isn't timed (or explained) again
+    cursor = conn.connection.dbapi_connection.cursor()
+    # a failed statement aborts the whole PostgreSQL transaction, the caller's one is kept behind a savepoint
+    savepoint = conn.dialect.name == "postgresql" and conn.in_transaction()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        cursor.execute(prefix + statement, parameters)
+        plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as exc:
+        if savepoint:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        cursor.close()
+
+
+def _find_caller():
+    func = get_caller_function(_CALLER_MODULES)
+    if func is None:
+        # async sessions run the statement in a greenlet, the awaiting coroutines are up the parent's stack
+        parent = greenlet.getcurrent().parent
+        if parent is not None and parent.gr_frame is not None:
+            func = get_caller_function(_CALLER_MODULES, parent.gr_frame)
+    return func
+
+
+class SlowQueryLog:
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS):
+        self.threshold_ms = 0.0
+        self.total = 0
+        self.set_threshold(threshold_ms)
+
+    def set_threshold(self, threshold_ms: float):
+        listening = self.threshold_ms > 0
+        self.threshold_ms = max(float(threshold_ms), 0.0)
+
+        if self.threshold_ms > 0 and not listening:
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(Engine, "handle_error", self._handle_error)
+        elif self.threshold_ms <= 0 and listening:
+            event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+            event.remove(Engine, "handle_error", self._handle_error)
+        logit(f"DB slow query threshold {self.threshold_ms}ms")
+
+    @staticmethod
+    def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    @staticmethod
+    def _handle_error(context):
+        # a failed statement never reaches after_cursor_execute, its start time would be taken by the next one
+        if context.connection is None:
+            return
+        start_times = context.connection.info.get("slow_query_start_time")
+        if start_times:
+            start_times.pop()
+
+    def _after_cursor_execute(self, conn, _cursor, statement, parameters, _context, executemany):
+        start_times = conn.info.get("slow_query_start_time")
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        self.total += 1
+        # the crud function (or route, for lazy loads) that issued it
+        func = _find_caller()
+        plan = "" if executemany else _explain(conn, statement, parameters)
+        slow_log.warning(
+            f"[{func.co_name if func else '-'}] {duration_ms:.1f}ms\n"
+            f"{statement}\n"
+            f"params: {str(parameters)[:1000]}\n"
+            f"plan:\n{plan}\n"
+        )
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,80 @@
+import os
+
+from sqlalchemy import Engine, event
+
+from app import logit, logging
+from app.utils.scheduler import PeriodicTask
+
+# durable: survives power loss, WAL lets readers run while a writer commits
+# balanced: can lose the last commits on power loss (never on app crash), bigger cache and mmap reads
+# fast: no fsync at all, only for demos, imports and benchmarks
+# their throughput is compared by python -m benchmarks.bench_sqlite_profiles
+SQLITE_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16_000,          # KiB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10_000,         # ms
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10_000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -256_000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5_000,
+    },
+}
+
+SQLITE_PROFILE = os.getenv("CDC_DB_PROFILE", "balanced")
+CHECKPOINT_INTERVAL = float(os.getenv("CDC_DB_CHECKPOINT_INTERVAL", "300"))
+
+
+def get_profile(name: str = SQLITE_PROFILE) -> dict:
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{name}', use one of {list(SQLITE_PROFILES)}")
+    return SQLITE_PROFILES[name]
+
+
+def apply_profile(engine: Engine, name: str = SQLITE_PROFILE, read_only: bool = False) -> None:
+    profile = get_profile(name)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # busy_timeout first, journal_mode needs a lock when another connection is writing
+            cursor.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+            if not read_only:
+                # the journal mode is stored in the database file, read-only connections just follow it
+                cursor.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous={profile['synchronous']}")
+            cursor.execute(f"PRAGMA cache_size={int(profile['cache_size'])}")
+            cursor.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+            cursor.execute(f"PRAGMA temp_store={profile['temp_store']}")
+        finally:
+            cursor.close()
+
+    logit(f"SQLite profile '{name}' {read_only=} {profile}")
+
+
+def checkpoint_and_optimize(engine: Engine) -> None:
+    with engine.connect() as conn:
+        busy, wal_pages, moved_pages = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+        conn.exec_driver_sql("PRAGMA optimize")
+    level = logging.WARNING if busy else logging.DEBUG
+    logit(f"WAL checkpoint {busy=} {wal_pages=} {moved_pages=}", level=level)
+
+
+def make_maintenance_task(engine: Engine, interval: float = CHECKPOINT_INTERVAL) -> PeriodicTask:
+    return PeriodicTask("sqlite-maintenance", interval, lambda: checkpoint_and_optimize(engine))
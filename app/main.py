@@ -10,9 +10,14 @@ from app.api.dues_payments import router as dues_payments_router
 from app.api.items import router as items_router
 from app.api.member_due_payment import router as member_due_payment_router
 from app.api.members import router as members_router
+from app.api.monthly_sales import router as monthly_sales_router
 from app.api.sellers import router as sellers_router
 from app.api.tests import router as tests_router
-from app.db import init_db, get_db
+from app.db import init_db, close_db, close_async_db
+from app.db.crud_stats import backfill_stats
+from app.db.dues_matrix import dues_matrix
+from app.db.query_stats import query_stats
+from app.db.reconciler import stats_reconciler
 from app.sec import router as sec_router, ip_filtering
 from app.utils.errors import CustomException
 from app.web import error_page
@@ -26,6 +31,7 @@ from app.web.login import router as login_router
 from app.web.member_due_payment import router as web_member_due_payment_router
 from app.web.members import router as web_members_router
 from app.web.members_items import router as web_members_items_router
+from app.web.monthly_sales import router as web_monthly_sales_router
 from app.web.sellers import router as web_sellers_router
 from app.web.sellers_items import router as web_sellers_items_router
 
@@ -33,9 +39,14 @@ from app.web.sellers_items import router as web_sellers_items_router
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     init_db()
+    backfill_stats()
+    dues_matrix.load()
+    stats_reconciler.start()
     logit(f"--- {NAME} {VERSION} Ready! ---")
     yield
-    get_db().close()
+    stats_reconciler.stop()
+    close_db()
+    await close_async_db()
     logit(f"--- {NAME} {VERSION} Closed! ---")
 
 
@@ -51,11 +62,16 @@ async def log_https_traffic(request: Request, call_next):
         "client": request.headers.get("x-forwarded-for", request.client.host),
         "path": str(request.url.path),
     }
+    db_queries = query_stats.start_request()
     try:
         ip_filtering.validate(**kwargs)
         response = await call_next(request)
         ip_filtering.update(response.status_code, **kwargs)
 
+        if db_queries is not None:
+            response.headers["X-DB-Queries"] = str(db_queries.count)
+            kwargs["db_queries"] = db_queries.as_dict(query_stats.repeat_threshold)
+
         log_traffic(status_code=response.status_code, **kwargs)
 
         return unified_response(response)
@@ -63,6 +79,9 @@ async def log_https_traffic(request: Request, call_next):
         exc.status_code = getattr(exc, "status_code", 501)
         level = logging.INFO if isinstance(exc, CustomException) else logging.WARNING
 
+        if db_queries is not None:
+            kwargs["db_queries"] = db_queries.as_dict(query_stats.repeat_threshold)
+
         log_traffic(status_code=exc.status_code, **kwargs, level=level)
         ip_filtering.update(exc.status_code, **kwargs)
 
@@ -110,6 +129,7 @@ app.include_router(dues_payments_router, prefix="/api/dues_payments", tags=["/ap
 app.include_router(member_due_payment_router, prefix="/api/member_due_payment", tags=["/api/member_due_payment"])
 app.include_router(sellers_router, prefix="/api/sellers", tags=["/api/sellers"])
 app.include_router(items_router, prefix="/api/items", tags=["/api/items"])
+app.include_router(monthly_sales_router, prefix="/api/monthly_sales", tags=["/api/monthly_sales"])
 app.include_router(tests_router, prefix="/api/tests", tags=["/api/tests"])
 
 # Web pages
@@ -125,6 +145,7 @@ app.include_router(web_sellers_router, prefix="/web/sellers", tags=["/web/seller
 app.include_router(web_sellers_ea_router, prefix="/web/expense-accounts", tags=["/web/expense-accounts"])
 app.include_router(web_sellers_items_router, prefix="/web/sellers-items", tags=["/web/sellers-items"])
 app.include_router(web_members_items_router, prefix="/web/members-items", tags=["/web/members-items"])
+app.include_router(web_monthly_sales_router, prefix="/web/monthly-sales", tags=["/web/monthly-sales"])
 
 # Web dashboards
 #app.mount("/web/dashboard1", WSGIMiddleware(dashboard1.server))
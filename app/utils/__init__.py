@@ -36,6 +36,10 @@ def get_today_year_month_str() -> str:
     return format_year_month(get_today())
 
 
+# the year-month strings format_year_month takes: 2024-06, 2024-6 or 202406
+YEAR_MONTH_PATTERN = r"^[1-9][0-9]{3}(-(0?[1-9]|1[0-2])|(0[1-9]|1[0-2]))$"
+
+
 def format_year_month(ym: str | date) -> str:
     if isinstance(ym, date):
         return ym.strftime("%Y-%m")
@@ -74,17 +78,23 @@ class DataframeSheet:
 
 
 def save_to_excel_sheets(*df_sheets: DataframeSheet, filename: str = "results.xlsx") -> StreamingResponse:
+    return excel_file_response(excel_sheets_to_bytes(*df_sheets), filename=filename)
+
+
+def excel_sheets_to_bytes(*df_sheets: DataframeSheet) -> bytes:
     # Save the DataFrame to an Excel file
     output = BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
         for dfs in df_sheets:
             if dfs.df is not None:
                 dfs.df.to_excel(writer, index=False, sheet_name=dfs.sheet_name)
-    output.seek(0)
+    return output.getvalue()
+
 
+def excel_file_response(content: bytes, filename: str = "results.xlsx") -> StreamingResponse:
     # Send the Excel file as a response
     return StreamingResponse(
-        output,
+        BytesIO(content),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -0,0 +1,47 @@
+import threading
+from typing import Callable
+
+from app import logit, logging
+
+
+class PeriodicTask:
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def start(self):
+        if self.interval <= 0 or self.is_running():
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.__thread.start()
+        logit(f"Started {self.name}, running every {self.interval}s")
+
+    def stop(self, timeout: float = 5.0):
+        if not self.is_running():
+            return
+        self.__stop.set()
+        self.__thread.join(timeout=timeout)
+        self.__thread = None
+        logit(f"Stopped {self.name}")
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def run_now(self):
+        # once, in its own thread, even when the periodic runs are disabled
+        threading.Thread(target=self._call, name=f"{self.name}-now", daemon=True).start()
+
+    def _run(self):
+        while not self.__stop.wait(self.interval):
+            self._call()
+
+    def _call(self):
+        try:
+            self.func()
+        except Exception as exc:
+            logit(f"{self.name} failed: {exc}", level=logging.WARNING)
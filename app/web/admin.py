@@ -1,6 +1,11 @@
 from fastapi import APIRouter, Request, status, Form
 from starlette.responses import HTMLResponse, RedirectResponse
 
+from app.db.cache import dues_cache
+from app.db.dues_matrix import dues_matrix
+from app.db.query_stats import query_stats
+from app.db.reconciler import stats_reconciler
+from app.db.slow_queries import slow_query_log
 from app.sec import (
     are_valid_scopes,
     cred,
@@ -128,3 +133,73 @@ def admin_unblock_client(
 
     return RedirectResponse(url=f"access_list", status_code=303)
 
+
+@router.get("/db", response_class=HTMLResponse)
+def admin_db(
+        request: Request,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:admin"], current_client)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="admin/admin_db.html",
+        context={
+            "query_stats_enabled": query_stats.is_enabled(),
+            "query_repeat_threshold": query_stats.repeat_threshold,
+            "slow_query_ms": slow_query_log.threshold_ms,
+            "slow_queries_total": slow_query_log.total,
+            "reconciler": stats_reconciler,
+            "dues_cache": dues_cache,
+            "dues_matrix": dues_matrix,
+        }
+    )
+
+
+@router.post("/db/query_stats", response_class=HTMLResponse)
+def admin_db_query_stats(
+        request: Request,
+        enabled: bool = Form(),
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:admin"], current_client)
+
+    if enabled:
+        query_stats.enable()
+    else:
+        query_stats.disable()
+
+    return RedirectResponse(url="/web/admin/db", status_code=303)
+
+
+@router.post("/db/slow_queries", response_class=HTMLResponse)
+def admin_db_slow_queries(
+        request: Request,
+        threshold_ms: float = Form(),
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:admin"], current_client)
+
+    slow_query_log.set_threshold(threshold_ms)
+
+    return RedirectResponse(url="/web/admin/db", status_code=303)
+
+
+@router.post("/db/reconcile", response_class=HTMLResponse)
+def admin_db_reconcile(
+        request: Request,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:admin"], current_client)
+
+    # can take a while on a big database, the page shows it running until it's done
+    stats_reconciler.run_in_background()
+
+    return RedirectResponse(url="/web/admin/db", status_code=303)
+
+
+@router.post("/db/dues_cache", response_class=HTMLResponse)
+def admin_db_dues_cache(
+        request: Request,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:admin"], current_client)
+
+    dues_cache.clear()
+
+    return RedirectResponse(url="/web/admin/db", status_code=303)
@@ -21,7 +21,7 @@ def list_categories(
     are_valid_scopes(["app:read", "category:read"], current_client)
 
     try:
-        categories = crud_items.get_categories_list(db, search_text=search_text)
+        categories = crud_items.get_categories_list(db, search_text=search_text, count_items=True)
     except CustomException as exc:
         return error_page(request, exc)
 
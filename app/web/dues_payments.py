@@ -3,7 +3,7 @@ from pydantic_core import ValidationError
 from sqlalchemy.orm import Session
 from starlette.responses import HTMLResponse, RedirectResponse
 
-from app.db import crud_dues_payments, schemas, DB_SESSION
+from app.db import crud_dues_payments, schemas, DB_SESSION, READ_DB_SESSION
 from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
 from app.utils import get_today_year_month_str, get_today
 from app.utils.errors import CustomException
@@ -16,7 +16,7 @@ router = APIRouter()
 def list_dues_payments(
         request: Request,
         since: str = None, until: str = None,
-        db: Session = DB_SESSION,
+        db: Session = READ_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "due_payment:read"], current_client)
 
@@ -69,3 +69,22 @@ async def create_due_payment_submit(
         return error_page(request, exc)
 
     return RedirectResponse(url=f"{dp.id_year_month}/show", status_code=303)
+
+
+@router.post("/create_range", response_class=HTMLResponse)
+async def create_due_payment_range_submit(
+        request: Request,
+        db: Session = DB_SESSION,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:create", "due_payment:create"], current_client)
+
+    data = await request.form()
+
+    try:
+        dues_payment_range: schemas.DuesPaymentRangeCreate = schemas.DuesPaymentRangeCreate(**data)
+
+        crud_dues_payments.create_dues_payment_year_month_range(db=db, dues_payment_range=dues_payment_range)
+    except (CustomException, ValidationError) as exc:
+        return error_page(request, exc)
+
+    return RedirectResponse(url=f"./?since={dues_payment_range.since}&until={dues_payment_range.until}", status_code=303)
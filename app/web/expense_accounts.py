@@ -20,7 +20,7 @@ def list_expense_accounts(
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "expense_account:read"], current_client)
 
-    expense_accounts = crud_sellers.get_expense_accounts_list(db, search_text=search_text)
+    expense_accounts = crud_sellers.get_expense_accounts_list(db, search_text=search_text, count_items=True)
 
     return templates.TemplateResponse(request=request, name="expense_accounts/expense_accounts_list.html", context={
         "expense_accounts": expense_accounts,
@@ -25,7 +25,7 @@ def list_items(
     are_valid_scopes(["app:read", "item:read"], current_client)
 
     try:
-        categories = crud_items.get_categories_list(db, search_text="")
+        categories = crud_items.get_categories_list(db, search_text="", count_items=True)
         if do_filter:
             items = crud_items.get_items_list(db, search_text=search_text, category_id=category_id)
         else:
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request
 from pydantic_core import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import HTMLResponse, RedirectResponse
 
-from app.db import crud_dues_payments, schemas, DB_SESSION
+from app.db import crud_dues_payments, schemas, DB_SESSION, READ_DB_SESSION, ASYNC_DB_SESSION
 from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
 from app.utils.errors import CustomException
 from app.web import templates, error_page
@@ -18,12 +19,12 @@ async def list_member_dues_payments_order_by_pay_date(
         until: str = None,
         just_download: bool = False,
         do_filter: bool = False,
-        db: Session = DB_SESSION,
+        adb: AsyncSession = ASYNC_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "member_due_payment:read"], current_client)
 
     if do_filter:
-        mdp_list = crud_dues_payments.list_member_dues_payments_order_by_pay_date(db, since=since, until=until, just_download=just_download)
+        mdp_list = await crud_dues_payments.list_member_dues_payments_order_by_pay_date_async(adb, since=since, until=until, just_download=just_download)
 
         if just_download:
             return mdp_list
@@ -36,6 +37,28 @@ async def list_member_dues_payments_order_by_pay_date(
     })
 
 
+@router.post("/pay", response_class=HTMLResponse)
+async def pay_member_dues_payments(
+        request: Request,
+        db: Session = DB_SESSION,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    are_valid_scopes(["app:create", "member_due_payment:create"], current_client)
+
+    data = await request.form()
+
+    try:
+        mdp_bulk: schemas.MemberDuesPaymentBulkPay = schemas.MemberDuesPaymentBulkPay(
+            **{key: value for key, value in data.items() if value and key != "tids"},
+            tids=data.getlist("tids") or None
+        )
+
+        mdp_list = crud_dues_payments.pay_member_dues_payments(db, mdp_bulk=mdp_bulk)
+    except (CustomException, ValidationError) as exc:
+        return error_page(request, exc)
+
+    return RedirectResponse(url=f"../members/{mdp_list[0].member_id}/show", status_code=303)
+
+
 @router.post("/{tid}", response_class=HTMLResponse)
 async def pay_member_due_payment(
         request: Request,
@@ -63,7 +86,7 @@ def table_dues_paid_for_all_members(
         until: str = None,
         just_download: bool = False,
         do_filter: bool = False,
-        db: Session = DB_SESSION,
+        db: Session = READ_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "member_due_payment:read"], current_client)
 
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request, status
 from pydantic_core import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import HTMLResponse, RedirectResponse
 
-from app.db import crud_member, schemas, DB_SESSION
+from app.db import crud_member, schemas, DB_SESSION, ASYNC_DB_SESSION
 from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
 from app.utils import get_today_year_month_str, get_today
 from app.utils.errors import CustomException
@@ -188,12 +189,12 @@ async def list_members_donations(
         until: str = None,
         just_download: bool = False,
         do_filter: bool = False,
-        db: Session = DB_SESSION,
+        adb: AsyncSession = ASYNC_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "member_donation:read"], current_client)
 
     if do_filter:
-        md_list = crud_member.list_member_donations_order_by_pay_date(db, since=since, until=until, just_download=just_download)
+        md_list = await crud_member.list_member_donations_order_by_pay_date_async(adb, since=since, until=until, just_download=just_download)
 
         if just_download:
             return md_list
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request
 from pydantic_core import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import HTMLResponse, RedirectResponse
 
-from app.db import crud_items, crud_member, schemas, DB_SESSION
+from app.db import crud_items, crud_member, schemas, DB_SESSION, ASYNC_DB_SESSION
 from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
 from app.utils import get_today
 from app.utils.errors import CustomException
@@ -13,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-def list_members_items(
+async def list_members_items(
         request: Request,
         do_filter: bool = False,
         search_text: str = "",
@@ -23,21 +24,21 @@ def list_members_items(
         tid: int = 0,
         since: str = "", until: str = "",
         just_download: bool = False,
-        db: Session = DB_SESSION,
+        adb: AsyncSession = ASYNC_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "member_item:read"], current_client)
 
     if do_filter:
-        members_items = crud_items.get_members_items_list(db, member_id=member_id, item_id=item_id, category_id=category_id, tid=tid, since=since, until=until, just_download=just_download, search_text=search_text)
+        members_items = await crud_items.get_members_items_list_async(adb, member_id=member_id, item_id=item_id, category_id=category_id, tid=tid, since=since, until=until, just_download=just_download, search_text=search_text)
 
         if just_download:
             return members_items
     else:
         members_items = []
 
-    categories = crud_items.get_categories_list(db, search_text="")
-    items = crud_items.get_items_list(db, search_text="")
-    members = crud_member.get_members_list(db, search_text="")
+    categories = await crud_items.get_categories_list_async(adb, search_text="")
+    items = await crud_items.get_items_list_async(adb, search_text="")
+    members = await crud_member.get_members_list_async(adb, search_text="")
 
     return templates.TemplateResponse(request=request, name="items/member_item_list.html", context={
         "request": request,
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Request
+from sqlalchemy.orm import Session
+from starlette.responses import HTMLResponse
+
+from app.db import crud_monthly_sales, READ_DB_SESSION
+from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
+from app.utils.errors import CustomException
+from app.web import templates, error_page
+
+router = APIRouter()
+
+# kind: (scope, title, show page of the entity)
+_KINDS = {
+    "category": ("category:read", "Categoria", "/web/categories"),
+    "item": ("item:read", "Item", "/web/items"),
+    "seller": ("seller:read", "Vendedor", "/web/sellers"),
+    "ea": ("expense_account:read", "Rubrica", "/web/expense-accounts"),
+}
+
+
+@router.get("/", response_class=HTMLResponse)
+def list_monthly_sales(
+        request: Request,
+        kind: str = "category",
+        entity_id: int = None,
+        since: str = None, until: str = None,
+        db: Session = READ_DB_SESSION,
+        current_client: TokenData = GET_CURRENT_WEB_CLIENT):
+    scope, _, _ = _KINDS.get(kind, ("app:read", "", ""))
+    are_valid_scopes(["app:read", scope], current_client)
+
+    try:
+        monthly_sales = crud_monthly_sales.get_monthly_sales_list(db, kind, entity_id=entity_id, since=since, until=until)
+    except CustomException as exc:
+        return error_page(request, exc)
+
+    return templates.TemplateResponse(request=request, name="monthly_sales/monthly_sales_list.html", context={
+        "monthly_sales": monthly_sales,
+        "total_results": len(monthly_sales),
+        "kinds": _KINDS,
+        "kind": kind, "entity_id": entity_id,
+        "since": since, "until": until,
+    })
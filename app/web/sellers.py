@@ -20,7 +20,7 @@ def list_sellers(
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "seller:read"], current_client)
 
-    sellers = crud_sellers.get_sellers_list(db, search_text=search_text)
+    sellers = crud_sellers.get_sellers_list(db, search_text=search_text, count_items=True)
 
     return templates.TemplateResponse(request=request, name="sellers/sellers_list.html", context={
         "sellers": sellers,
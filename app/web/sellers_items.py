@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request
 from pydantic_core import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import HTMLResponse, RedirectResponse
 
-from app.db import crud_items, crud_sellers, schemas, DB_SESSION
+from app.db import crud_items, crud_sellers, schemas, DB_SESSION, ASYNC_DB_SESSION
 from app.sec import GET_CURRENT_WEB_CLIENT, TokenData, are_valid_scopes
 from app.utils import get_today
 from app.utils.errors import CustomException
@@ -13,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-def list_sellers_items(
+async def list_sellers_items(
         request: Request,
         do_filter: bool = False,
         search_text: str = "",
@@ -24,22 +25,22 @@ def list_sellers_items(
         tid: int = 0,
         since: str = "", until: str = "",
         just_download: bool = False,
-        db: Session = DB_SESSION,
+        adb: AsyncSession = ASYNC_DB_SESSION,
         current_client: TokenData = GET_CURRENT_WEB_CLIENT):
     are_valid_scopes(["app:read", "seller_item:read"], current_client)
 
     if do_filter:
-        sellers_items = crud_items.get_sellers_items_list(db, seller_id=seller_id, ea_id=ea_id, item_id=item_id, category_id=category_id, tid=tid, since=since, until=until, just_download=just_download, search_text=search_text)
+        sellers_items = await crud_items.get_sellers_items_list_async(adb, seller_id=seller_id, ea_id=ea_id, item_id=item_id, category_id=category_id, tid=tid, since=since, until=until, just_download=just_download, search_text=search_text)
 
         if just_download:
             return sellers_items
     else:
         sellers_items = []
 
-    categories = crud_items.get_categories_list(db, search_text="")
-    items = crud_items.get_items_list(db, search_text="")
-    sellers = crud_sellers.get_sellers_list(db, search_text="")
-    expense_accounts = crud_sellers.get_expense_accounts_list(db, search_text="")
+    categories = await crud_items.get_categories_list_async(adb, search_text="")
+    items = await crud_items.get_items_list_async(adb, search_text="")
+    sellers = await crud_sellers.get_sellers_list_async(adb, search_text="")
+    expense_accounts = await crud_sellers.get_expense_accounts_list_async(adb, search_text="")
 
     return templates.TemplateResponse(request=request, name="items/seller_item_list.html", context={
         "categories": categories,
@@ -0,0 +1,43 @@
+# python -m benchmarks.bench_dues_pivot [members] [months]
+import sys
+
+from benchmarks.common import seed_dues, best_of, year_months
+
+from app.db import init_db, close_db, SessionLocal, crud_dues_payments, crud_stats
+from app.db.cache import dues_cache
+from app.db.dues_matrix import dues_matrix
+
+
+def _drop_matrix() -> None:
+    # an untracked dues write, the next read builds the matrix again
+    with SessionLocal() as db:
+        crud_stats.bump_data_version(db, crud_stats.DUES_DATA_VERSION)
+        db.commit()
+
+
+def main(members: int = 2000, months: int = 120) -> None:
+    seed_dues(members, months)
+    last_months = year_months(2015, months)
+    print(f"dues pivot, {members} members x {months} months, best of 3 (both frames)")
+    print(f"{'months':>8} {'cold':>9} {'warm':>9} {'cached':>9}")
+    with SessionLocal() as db:
+        for count in (months, 12, 3):
+            since, until = last_months[-count], last_months[-1]
+
+            def pivot():
+                return crud_dues_payments.pivot_table_dues_paid_for_all_members(db, since=since, until=until)
+
+            # cold: matrix and cache empty, warm: matrix built and cache empty, cached: the same pivot again
+            cold = best_of(pivot, setup=_drop_matrix)
+            warm = best_of(pivot, setup=dues_cache.clear)
+            cached = best_of(pivot)
+            print(f"{count:>8} {cold:>8.3f}s {warm:>8.3f}s {cached:>8.3f}s")
+    print(f"matrix builds={dues_matrix.builds} last build {dues_matrix.last_build_time:.3f}s")
+
+
+if __name__ == "__main__":
+    init_db()
+    try:
+        main(*map(int, sys.argv[1:3]))
+    finally:
+        close_db()
@@ -0,0 +1,48 @@
+# python -m benchmarks.bench_sqlite_profiles [operations]
+import datetime
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+
+from app.db import models, sqlite_profile
+from app.db.database import Base, engine_options
+
+
+def run_profile(name: str, operations: int) -> tuple[float, float]:
+    # one single-row commit per write, like a request creating a member; a small aggregate per read
+    url = f"sqlite:///{tempfile.mkdtemp(prefix=f'cdc_bench_{name}_')}/data.spsql"
+    engine = create_engine(url, **engine_options(url))
+    sqlite_profile.apply_profile(engine, name)
+    Base.metadata.create_all(engine)
+    try:
+        start = time.perf_counter()
+        for i in range(operations):
+            with Session(engine) as db:
+                db.execute(insert(models.Member).values(
+                    name=f"Member {i}", tlf="912345678", start_date=datetime.date(2024, 1, 1), amount=10.0
+                ))
+                db.commit()
+        writes = operations / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(operations):
+            with Session(engine) as db:
+                db.scalar(select(func.sum(models.Member.amount)).where(models.Member.member_id <= i))
+        reads = operations / (time.perf_counter() - start)
+    finally:
+        engine.dispose()
+    return writes, reads
+
+
+def main(operations: int = 2000) -> None:
+    print(f"SQLite profiles, {operations} commits then {operations} reads (default '{sqlite_profile.SQLITE_PROFILE}')")
+    for name in sqlite_profile.SQLITE_PROFILES:
+        writes, reads = run_profile(name, operations)
+        print(f"{name:>9} writes/s={writes:8.0f} reads/s={reads:8.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
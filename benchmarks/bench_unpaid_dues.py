@@ -0,0 +1,79 @@
+# python -m benchmarks.bench_unpaid_dues [members] [months]
+import sys
+
+from benchmarks.common import seed_dues, best_of
+
+from sqlalchemy import select, func, Index
+
+from app.db import init_db, close_db, SessionLocal, models, crud_member
+from app.db.database import is_sqlite, DATABASE_URL
+
+_mdp = models.MemberDuesPayment
+
+
+def _queries(member_id: int, id_year_month: str) -> dict:
+    # the unpaid dues reads, all filtered by models.MDP_UNPAID_ACTIVE
+    return {
+        "member missing": select(func.count(), func.sum(_mdp.amount)).filter(
+            _mdp.member_id == member_id, models.MDP_UNPAID_ACTIVE, _mdp.id_year_month <= id_year_month
+        ),
+        "month missing": select(func.count(), func.sum(_mdp.amount)).filter(
+            _mdp.id_year_month == id_year_month, models.MDP_UNPAID_ACTIVE
+        ),
+        "missing by month": select(_mdp.id_year_month, func.count(), func.sum(_mdp.amount)).filter(
+            models.MDP_UNPAID_ACTIVE
+        ).group_by(_mdp.id_year_month),
+        "members due missing": crud_member._select_all_members(only_due_missing=True),
+    }
+
+
+def _partial_indexes() -> list[Index]:
+    return [index for index in _mdp.__table__.indexes if index.dialect_options["sqlite"]["where"] is not None]
+
+
+def _plan(db, stmt) -> str:
+    explain = "EXPLAIN QUERY PLAN " if is_sqlite(DATABASE_URL) else "EXPLAIN "
+    rows = db.connection().exec_driver_sql(explain + str(stmt.compile(db.bind, compile_kwargs={"literal_binds": True}))).all()
+    return " | ".join(str(row[-1]).strip() for row in rows)
+
+
+def _run(db, queries: dict, label: str) -> dict:
+    print(label)
+    times = {}
+    for name, stmt in queries.items():
+        times[name] = best_of(lambda: db.execute(stmt).all(), repeat=5)
+        print(f"  {name:<20} {times[name] * 1000:9.2f} ms  {_plan(db, stmt)}")
+    return times
+
+
+def main(members: int = 2000, months: int = 120) -> None:
+    seed_dues(members, months)
+    with SessionLocal() as db:
+        last_month = db.scalar(select(func.max(models.DuesPayment.id_year_month)))
+        queries = _queries(members // 2 + 1, last_month)
+        print(f"unpaid dues, {members} members x {months} months, best of 5")
+        with_indexes = _run(db, queries, "with the partial indexes")
+
+        indexes = _partial_indexes()
+        for index in indexes:
+            index.drop(db.connection())
+        db.connection().exec_driver_sql("ANALYZE")
+        try:
+            without_indexes = _run(db, queries, "without them")
+        finally:
+            for index in indexes:
+                index.create(db.connection())
+            db.connection().exec_driver_sql("ANALYZE")
+            db.commit()
+
+    print("speedup")
+    for name, seconds in with_indexes.items():
+        print(f"  {name:<20} {without_indexes[name] / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    init_db()
+    try:
+        main(*map(int, sys.argv[1:3]))
+    finally:
+        close_db()
@@ -0,0 +1,64 @@
+import datetime
+import os
+import random
+import tempfile
+import time
+from typing import Callable
+
+# a throwaway SQLite database unless CDC_DATABASE_URL is set, before the app's engines are created
+os.environ.setdefault("CDC_MODE", "TEST")
+os.environ.setdefault("CDC_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='cdc_bench_')}/data.spsql")
+os.environ.setdefault("CDC_DB_CHECKPOINT_INTERVAL", "0")
+os.environ.setdefault("CDC_DB_SLOW_QUERY_MS", "0")
+
+from sqlalchemy import insert
+
+from app.db import SessionLocal, models, crud_stats
+from app.db.models import clear_db
+
+
+def year_months(first_year: int, count: int) -> list[str]:
+    return [f"{first_year + k // 12}-{k % 12 + 1:02d}" for k in range(count)]
+
+
+def seed_dues(members: int = 2000, months: int = 120, first_year: int = 2015, paid: float = 0.9, seed: int = 1) -> None:
+    # members since the first month, every tenth one inactive for the second half, `paid` of the active dues paid
+    clear_db()
+    rnd = random.Random(seed)
+    id_year_months = year_months(first_year, months)
+    now = datetime.datetime(first_year + months // 12, 1, 1)
+    with SessionLocal() as db:
+        db.execute(insert(models.DuesPayment), [
+            {"id_year_month": ym, "date_ym": datetime.date(int(ym[:4]), int(ym[5:]), 1), "year": int(ym[:4]), "month": int(ym[5:])}
+            for ym in id_year_months
+        ])
+        db.execute(insert(models.Member), [
+            {"member_id": member_id, "name": f"Member {member_id}", "tlf": "912345678", "email": "", "notes": "",
+             "start_date": datetime.date(first_year, 1, 1), "is_active": member_id % 10 != 0, "amount": 10.0}
+            for member_id in range(1, members + 1)
+        ])
+        for member_id in range(1, members + 1):
+            dues = []
+            for k, ym in enumerate(id_year_months):
+                is_active = member_id % 10 != 0 or k < months // 2
+                dues.append({
+                    "member_id": member_id, "id_year_month": ym, "amount": 10.0 if is_active else 0.0,
+                    "is_paid": not is_active or rnd.random() < paid, "is_member_active": is_active, "pay_update_time": now,
+                })
+            db.execute(insert(models.MemberDuesPayment), dues)
+        crud_stats.rebuild_all_stats(db)
+        db.commit()
+        db.connection().exec_driver_sql("ANALYZE")
+        db.commit()
+
+
+def best_of(func: Callable[[], object], repeat: int = 3, setup: Callable[[], object] = None) -> float:
+    # seconds of the fastest run, setup runs before each one and isn't timed
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
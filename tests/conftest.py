@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+# before the app is imported, its engines are created from these
+os.environ.setdefault("CDC_MODE", "TEST")
+os.environ.setdefault("CDC_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='cdc_tests_')}/data.spsql")
+os.environ.setdefault("CDC_DB_CHECKPOINT_INTERVAL", "0")
+os.environ.setdefault("CDC_DB_SLOW_QUERY_MS", "0")
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import filename_from_root
+from app.db import init_db, close_db, SessionLocal
+from app.db.models import clear_db
+from app.db.query_stats import query_stats
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
+    yield
+    close_db()
+
+
+@pytest.fixture
+def db():
+    clear_db()
+    with SessionLocal() as _db:
+        yield _db
+
+
+@pytest.fixture
+def count_queries():
+    # the SQL statements a call runs, counted like a request's
+    def _count_queries(func) -> int:
+        query_stats.enable()
+        try:
+            request_queries = query_stats.start_request()
+            func()
+            return request_queries.count
+        finally:
+            query_stats.disable()
+    return _count_queries
+
+
+@pytest.fixture(scope="session")
+def data_files():
+    # the security module reads these on import, a checkout only has the templates
+    created = []
+    for name in ("credentials.json", "access_list.json"):
+        filename = filename_from_root(f"data/{name}")
+        if not os.path.exists(filename):
+            shutil.copyfile(filename_from_root(f"data/template_{name}"), filename)
+            created.append(filename)
+    yield
+    for filename in created:
+        os.remove(filename)
+
+
+@pytest.fixture
+def api(db, data_files):
+    # the API routers alone, as a client with every scope
+    from app.api.dues_payments import router as dues_payments_router
+    from app.api.member_due_payment import router as member_due_payment_router
+    from app.sec import get_current_api_client, TokenData
+
+    _app = FastAPI()
+    _app.include_router(dues_payments_router, prefix="/api/dues_payments")
+    _app.include_router(member_due_payment_router, prefix="/api/member_due_payment")
+    _app.dependency_overrides[get_current_api_client] = lambda: TokenData(
+        client_id="test", scopes=["app:read", "app:create", "app:update", "app:delete"]
+    )
+    with TestClient(_app, raise_server_exceptions=False) as client:
+        yield client
@@ -0,0 +1,25 @@
+import datetime
+
+from app.db import crud_dues_payments, crud_member, schemas
+from app.db.query_stats import query_stats
+
+
+def test_member_dues_changes_update_each_stats_table_once(db):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-12"))
+    db_member = crud_member.create_member(db, schemas.MemberCreate(
+        start_date=datetime.date(2023, 12, 1), amount=10, name="Member", tlf="912345678", email="member@cdc.pt"
+    ))
+    query_stats.enable()
+    try:
+        request_queries = query_stats.start_request()
+        crud_member.update_member_active(db, db_member, schemas.MemberUpdateActive(since="2024-02", is_active=False))
+        crud_member.update_member_amount(db, crud_member.update_member_active(
+            db, db_member, schemas.MemberUpdateActive(since="2024-02", is_active=True)
+        ), schemas.MemberUpdateAmount(since="2024-08", amount=12))
+    finally:
+        query_stats.disable()
+
+    # one statement per change for the 11 and 5 months changed, not one per month
+    updates = [statement for statement in request_queries.statements.elements() if statement.startswith("UPDATE dues_payments")]
+    assert len(updates) == 3
+    assert crud_dues_payments.get_due_payment_year_month_stats(db, "2024-12").total_amount_missing == 12
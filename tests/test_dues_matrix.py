@@ -0,0 +1,50 @@
+import datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from app.db import crud_dues_payments, crud_member, models, schemas
+from app.db.dues_matrix import dues_matrix, build_dues_matrix
+from app.db.reconciler import StatsReconciler
+
+
+def _member(name: str, start_date: datetime.date) -> schemas.MemberCreate:
+    return schemas.MemberCreate(start_date=start_date, amount=10, name=name, tlf="912345678", email=f"{name.lower()}@cdc.pt")
+
+
+def _assert_same(matrix, built):
+    assert matrix.version == built.version
+    assert matrix.member_ids.tolist() == built.member_ids.tolist()
+    assert matrix.names.tolist() == built.names.tolist()
+    assert matrix.months == built.months
+    assert np.array_equal(matrix.flags, built.flags)
+    assert np.array_equal(matrix.amounts, built.amounts)
+
+
+def test_new_members_months_and_renames_are_applied_without_a_rebuild(db):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-02", until="2024-03"))
+    first = crud_member.create_member(db, _member("First", datetime.date(2023, 12, 1)))
+    dues_matrix.get(db)
+    builds, updates = dues_matrix.builds, dues_matrix.updates
+
+    # a month before the others, new members one by one and in bulk, and a rename
+    crud_dues_payments.create_dues_payment_year_month(db, schemas.DuesPaymentCreate(id_year_month="2024-01"))
+    crud_member.create_member(db, _member("Second", datetime.date(2024, 1, 1)))
+    crud_member.create_members(db, [_member(f"Bulk{i}", datetime.date(2024, 2, 1)) for i in range(3)])
+    crud_dues_payments.create_dues_payment_year_month(db, schemas.DuesPaymentCreate(id_year_month="2024-04"))
+    crud_member.update_member(db, crud_member.get_member_by_id(db, first.member_id), schemas.MemberUpdate(name="Renamed"))
+
+    # and the dues of existing cells
+    tid = db.scalar(select(models.MemberDuesPayment.tid).filter_by(member_id=first.member_id, id_year_month="2024-01"))
+    crud_dues_payments.pay_member_due_payment(db, tid=tid, mdpc=schemas.MemberDuesPaymentCreate(is_cash=True))
+    crud_member.update_member_amount(db, crud_member.get_member_by_id(db, first.member_id),
+                                     schemas.MemberUpdateAmount(since="2024-03", amount=5))
+    crud_member.update_member_active(db, crud_member.get_member_by_id(db, first.member_id),
+                                     schemas.MemberUpdateActive(since="2024-04", is_active=False))
+    StatsReconciler(interval=0, pause=0).run()
+
+    matrix = dues_matrix.get(db)
+    assert (dues_matrix.builds, dues_matrix.updates) == (builds, updates + 8)
+    assert matrix.months == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    assert matrix.names.tolist()[0] == "Renamed"
+    _assert_same(matrix, build_dues_matrix(db))
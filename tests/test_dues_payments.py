@@ -0,0 +1,23 @@
+import datetime
+
+from app.db import crud_dues_payments, crud_member, schemas
+from app.db.cache import dues_cache
+
+
+def _months_list_queries(db, count_queries, until: str) -> int:
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until=until))
+    dues_cache.clear()
+    months = []
+    total = count_queries(lambda: months.extend(crud_dues_payments.get_dues_payment_year_month_stats_list(db)))
+    assert months[-1].id_year_month == until and months[-1].total_members_missing == 5
+    return total
+
+
+def test_dues_months_list_queries_dont_grow_with_the_months(db, count_queries):
+    crud_member.create_members(db, [
+        schemas.MemberCreate(start_date=datetime.date(2023, 12, 1), amount=10, name=f"Member {i}", tlf="912345678", email="member@cdc.pt")
+        for i in range(5)
+    ])
+    queries = _months_list_queries(db, count_queries, "2024-03")
+    assert queries <= 2
+    assert _months_list_queries(db, count_queries, "2025-12") == queries
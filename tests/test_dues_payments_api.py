@@ -0,0 +1,33 @@
+import datetime
+
+from app.db import crud_member, schemas
+
+
+def test_open_a_range_of_dues_months(api, db):
+    db_member = crud_member.create_member(db, schemas.MemberCreate(
+        start_date=datetime.date(2023, 12, 1), amount=10, name="Member", tlf="912345678", email="member@cdc.pt"
+    ))
+
+    response = api.post("/api/dues_payments/range", json={"since": "2024-01", "until": "2024-03"})
+    assert response.status_code == 201
+    assert [(dp["id_year_month"], dp["total_members_missing"], dp["total_amount_missing"]) for dp in response.json()] == [
+        ("2024-01", 1, 10), ("2024-02", 1, 10), ("2024-03", 1, 10)
+    ]
+
+    # the months already open are kept, only the new one is added
+    response = api.post("/api/dues_payments/range", json={"since": "2024-02", "until": "2024-04"})
+    assert response.status_code == 201
+    assert [(dp["id_year_month"], dp["total_members_missing"]) for dp in response.json()] == [
+        ("2024-02", 1), ("2024-03", 1), ("2024-04", 1)
+    ]
+    # written by the API's own session
+    db.expire_all()
+    assert crud_member.get_member_by_id(db, db_member.member_id).total_months_missing == 4
+
+
+def test_a_bad_range_of_dues_months_is_refused(api, db):
+    assert api.post("/api/dues_payments/range", json={"since": "2024-06", "until": "2024-01"}).status_code == 400
+    assert api.post("/api/dues_payments/range", json={"since": "1900-01", "until": "2100-12"}).status_code == 400
+    for since in ("foo", "2024-13", "2024-00", "0000-01", "2024-01-01"):
+        assert api.post("/api/dues_payments/range", json={"since": since, "until": "2024-12"}).status_code == 422
+    assert api.get("/api/dues_payments/").json() == []
@@ -0,0 +1,14 @@
+import pytest
+
+from app.db import crud_dues_payments, schemas
+from app.utils.errors import NotFound404
+
+
+def test_the_pivot_of_a_range_without_months(db):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-03"))
+
+    df_paid, df_missing = crud_dues_payments.pivot_table_dues_paid_for_all_members(db, until="2023-12")
+    assert df_paid.empty and df_missing.empty
+    with pytest.raises(NotFound404):
+        crud_dues_payments.pivot_table_dues_paid_for_all_members(db, until="2023-12", just_download=True)
+    assert crud_dues_payments.pivot_table_dues_paid_for_all_members(db, since="2024-02", just_download=True).status_code == 200
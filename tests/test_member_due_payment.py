@@ -0,0 +1,28 @@
+import datetime
+
+import pytest
+
+from app.db import crud_dues_payments, crud_member, schemas, SessionLocal
+from app.utils.errors import Conflict409
+
+
+def test_a_due_paid_meanwhile_is_not_paid_again(db):
+    crud_dues_payments.create_dues_payment_year_month(db, schemas.DuesPaymentCreate(id_year_month="2024-01"))
+    db_member = crud_member.create_member(db, schemas.MemberCreate(
+        start_date=datetime.date(2023, 12, 1), amount=10, name="Member", tlf="912345678", email="member@cdc.pt"
+    ))
+    tid = crud_member.get_member_view(db, db_member.member_id).member_due_payment[0].tid
+    payment = schemas.MemberDuesPaymentCreate(is_cash=True, pay_date=datetime.date(2024, 1, 5))
+
+    # both requests read the due while it's still unpaid
+    with SessionLocal() as other_db:
+        assert not crud_dues_payments.get_member_due_payment(db, tid).is_paid
+        assert not crud_dues_payments.get_member_due_payment(other_db, tid).is_paid
+        crud_dues_payments.pay_member_due_payment(other_db, tid=tid, mdpc=payment)
+        with pytest.raises(Conflict409):
+            crud_dues_payments.pay_member_due_payment(db, tid=tid, mdpc=payment)
+
+    db_member = crud_member.get_member_by_id(db, db_member.member_id)
+    assert (db_member.total_months_paid, db_member.total_amount_paid, db_member.total_months_missing) == (1, 10, 0)
+    dues_payment = crud_dues_payments.get_due_payment_year_month_stats(db, "2024-01")
+    assert (dues_payment.total_members_paid, dues_payment.total_amount_paid) == (1, 10)
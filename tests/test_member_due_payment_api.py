@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.db import crud_dues_payments, crud_member, models, schemas
+
+
+@pytest.fixture
+def member(db):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-04"))
+    return crud_member.create_member(db, schemas.MemberCreate(
+        start_date=datetime.date(2023, 12, 1), amount=10, name="Member", tlf="912345678", email="member@cdc.pt"
+    ))
+
+
+def _tids(db, member_id: int) -> dict[str, int]:
+    return dict(db.execute(select(models.MemberDuesPayment.id_year_month, models.MemberDuesPayment.tid).filter_by(member_id=member_id)).all())
+
+
+def _totals(db, member_id: int) -> tuple:
+    # written by the API's own session
+    db.expire_all()
+    db_member = crud_member.get_member_by_id(db, member_id)
+    return db_member.total_months_paid, db_member.total_amount_paid, db_member.total_months_missing, db_member.total_amount_missing
+
+
+def test_pay_dues_by_tids(api, db, member):
+    tids = _tids(db, member.member_id)
+    response = api.put("/api/member_due_payment/", json={"tids": [tids["2024-01"], tids["2024-03"]], "is_cash": True})
+    assert response.status_code == 200
+    assert [(mdp["id_year_month"], mdp["is_paid"], mdp["is_cash"]) for mdp in response.json()] == [
+        ("2024-01", True, True), ("2024-03", True, True)
+    ]
+    assert _totals(db, member.member_id) == (2, 20, 2, 20)
+    assert crud_dues_payments.get_due_payment_year_month_stats(db, "2024-01").total_members_paid == 1
+
+
+def test_pay_dues_of_a_member_range(api, db, member):
+    response = api.put("/api/member_due_payment/", json={"member_id": member.member_id, "since": "2024-02", "until": "2024-03"})
+    assert response.status_code == 200
+    assert [mdp["id_year_month"] for mdp in response.json()] == ["2024-02", "2024-03"]
+    assert _totals(db, member.member_id) == (2, 20, 2, 20)
+
+    # nothing left to pay in the range
+    response = api.put("/api/member_due_payment/", json={"member_id": member.member_id, "since": "2024-02", "until": "2024-03"})
+    assert response.status_code == 404
+
+
+def test_pay_dues_all_or_nothing(api, db, member):
+    tids = _tids(db, member.member_id)
+    assert api.put("/api/member_due_payment/", json={"tids": [tids["2024-02"]]}).status_code == 200
+
+    # one of them unknown, or already paid: none is paid
+    assert api.put("/api/member_due_payment/", json={"tids": [tids["2024-01"], 999_999]}).status_code == 404
+    assert api.put("/api/member_due_payment/", json={"tids": [tids["2024-01"], tids["2024-02"]]}).status_code == 409
+    assert _totals(db, member.member_id) == (1, 10, 3, 30)
+    assert not crud_dues_payments.get_member_due_payment(db, tids["2024-01"]).is_paid
+
+
+def test_pay_dues_refuses_bad_input(api, db, member):
+    for since in ("bad", "2024-13", "2024-01-01"):
+        assert api.put("/api/member_due_payment/", json={"member_id": member.member_id, "since": since}).status_code == 422
+    assert api.put("/api/member_due_payment/", json={"member_id": member.member_id, "until": "bad"}).status_code == 422
+    assert api.put("/api/member_due_payment/", json={}).status_code == 400
+    assert _totals(db, member.member_id) == (0, 0, 4, 40)
@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.db import crud_dues_payments, crud_member, models, schemas
+
+
+def _member(name: str, is_active: bool) -> schemas.MemberCreate:
+    return schemas.MemberCreate(
+        start_date=datetime.date(2023, 12, 1), is_active=is_active, amount=10, name=name, tlf="912345678", email="member@cdc.pt"
+    )
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_new_members_owe_their_amount_since_they_start(db, bulk):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-03"))
+    members = [_member("Active", True), _member("Inactive", False)]
+    db_members = crud_member.create_members(db, members) if bulk else [crud_member.create_member(db, m) for m in members]
+
+    # inactive or not, as when they were created one due at a time
+    _mdp = models.MemberDuesPayment
+    for db_member in db_members:
+        assert db.execute(select(_mdp.amount, _mdp.is_paid, _mdp.is_member_active).filter_by(member_id=db_member.member_id)).all() == [
+            (10, False, True)
+        ] * 3
+        assert (db_member.total_months_missing, db_member.total_amount_missing) == (3, 30)
+    dues_payment = crud_dues_payments.get_due_payment_year_month_stats(db, "2024-01")
+    assert (dues_payment.total_members_missing, dues_payment.total_amount_missing) == (2, 20)
+
+
+@pytest.mark.parametrize("only_due_missing", [True, False])
+def test_members_pages_filtered_by_dues_match_the_full_list(db, only_due_missing):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-04"))
+    db_members = crud_member.create_members(db, [_member(f"Member{i}", True) for i in range(11)])
+    # every third member pays all their dues, the others some or none, so each has several rows in the join
+    _mdp = models.MemberDuesPayment
+    for i, db_member in enumerate(db_members):
+        paid = 4 if i % 3 == 0 else i % 3
+        tids = db.scalars(select(_mdp.tid).filter_by(member_id=db_member.member_id).order_by(_mdp.id_year_month).limit(paid)).all()
+        crud_dues_payments.pay_member_dues_payments(db, schemas.MemberDuesPaymentBulkPay(tids=tids))
+
+    def page(skip: int, limit: int) -> list:
+        return [
+            (m.member_id, m.total_months_missing, m.total_amount_missing) if only_due_missing else m.member_id
+            for m in crud_member.get_members_list(db, skip=skip, limit=limit, only_due_missing=only_due_missing)
+        ]
+
+    full = page(0, 1000)
+    assert len(full) == (7 if only_due_missing else 11)
+    assert [row for skip in range(0, len(full), 3) for row in page(skip, 3)] == full
+    if only_due_missing:
+        assert {(months, amount) for _, months, amount in full} == {(3, 30), (2, 20)}
+
+
+def test_created_members_are_returned_loaded(db, count_queries):
+    crud_dues_payments.create_dues_payment_year_month_range(db, schemas.DuesPaymentRangeCreate(since="2024-01", until="2024-12"))
+    db_members = crud_member.create_members(db, [
+        schemas.MemberCreate(start_date=datetime.date(2023, 12, 1), amount=10, name=f"Member {i}", tlf="912345678", email="member@cdc.pt")
+        for i in range(20)
+    ])
+    members = []
+    assert count_queries(lambda: members.extend(schemas.Member.model_validate(m, from_attributes=True) for m in db_members)) == 0
+    assert [member.total_months_missing for member in members] == [12] * 20
@@ -0,0 +1,75 @@
+import datetime
+import math
+import random
+
+from sqlalchemy import select
+
+from app.db import crud_items, crud_member, crud_sellers, crud_stats, models, schemas
+
+
+def _monthly_sales(db) -> dict:
+    _ms = models.MonthlySales
+    return {
+        (kind, entity_id, year_month): values
+        for kind, entity_id, year_month, *values in db.execute(select(
+            _ms.kind, _ms.entity_id, _ms.id_year_month, *[getattr(_ms, name) for name in crud_stats._MONTHLY_TOTALS]
+        ))
+    }
+
+
+def _random_date(rnd: random.Random) -> datetime.date:
+    return datetime.date(2024, rnd.randint(1, 12), rnd.randint(1, 28))
+
+
+def test_monthly_sales_follow_the_item_writes_like_a_rebuild(db):
+    rnd = random.Random(15)
+    categories = [crud_items.create_category(db, schemas.CategoryCreate(name=f"Category {i}")).category_id for i in range(3)]
+    items = [
+        crud_items.create_item(db, schemas.ItemCreate(category_id=rnd.choice(categories), name=f"Item {i}", base_price=1.0)).item_id
+        for i in range(6)
+    ]
+    sellers = [crud_sellers.create_seller(db, schemas.SellerCreate(name=f"Seller {i}", tlf="912345670", email="seller@cdc.pt")).seller_id for i in range(3)]
+    eas = [crud_sellers.create_expense_account(db, schemas.ExpenseAccountCreate(name=f"Account {i}")).ea_id for i in range(3)]
+    members = [
+        db_member.member_id for db_member in crud_member.create_members(db, [
+            schemas.MemberCreate(amount=10, name=f"Member {i}", tlf="912345678", email="member@cdc.pt") for i in range(3)
+        ])
+    ]
+
+    seller_items, member_items = [], []
+    for _ in range(300):
+        # prices like 0.1 and 0.7 don't add up to exactly 0 again when moved away
+        price = round(rnd.uniform(0.1, 20), 2)
+        action = rnd.random()
+        if action < 0.25 or not seller_items:
+            seller_items.append(crud_items.create_seller_item(db, rnd.choice(items), schemas.SellerItemsCreate(
+                seller_id=rnd.choice(sellers), ea_id=rnd.choice(eas), quantity=rnd.randint(1, 3), total_price=price,
+                purchase_date=_random_date(rnd), is_cash=True,
+            )).tid)
+        elif action < 0.4 or not member_items:
+            member_items.append(crud_items.create_member_item(db, rnd.choice(items), schemas.MemberItemsCreate(
+                member_id=rnd.choice(members), quantity=rnd.randint(1, 3), total_price=price,
+                purchase_date=_random_date(rnd), is_cash=True,
+            )).tid)
+        elif action < 0.7:
+            crud_items.update_seller_item(db, crud_items.get_seller_item(db, rnd.choice(seller_items)), schemas.SellerItemsUpdate(**rnd.choice([
+                {"item_id": rnd.choice(items)}, {"seller_id": rnd.choice(sellers)}, {"ea_id": rnd.choice(eas)},
+                {"purchase_date": _random_date(rnd)}, {"total_price": price},
+            ])))
+        elif action < 0.9:
+            crud_items.update_member_item(db, crud_items.get_member_item(db, rnd.choice(member_items)), schemas.MemberItemsUpdate(**rnd.choice([
+                {"item_id": rnd.choice(items)}, {"member_id": rnd.choice(members)},
+                {"purchase_date": _random_date(rnd)}, {"total_price": price},
+            ])))
+        else:
+            db_item = crud_items.get_item_by_id(db, rnd.choice(items))
+            crud_items.update_item(db, db_item, schemas.ItemUpdate(category_id=rnd.choice(categories)))
+
+    incremental = _monthly_sales(db)
+    crud_stats.rebuild_monthly_sales(db)
+    rebuilt = _monthly_sales(db)
+    db.rollback()
+
+    assert incremental.keys() == rebuilt.keys()
+    for key, values in rebuilt.items():
+        assert all(math.isclose(a or 0, b or 0, abs_tol=1e-6) for a, b in zip(incremental[key], values)), key
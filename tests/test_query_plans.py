@@ -0,0 +1,28 @@
+import pytest
+
+from app.db.crud_items import _select_sellers_items, _select_members_items
+from app.db.database import engine, is_sqlite
+
+pytestmark = pytest.mark.skipif(not is_sqlite(engine.url), reason="EXPLAIN QUERY PLAN is SQLite's")
+
+
+def _query_plan(stmt) -> str:
+    _sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return "\n".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {_sql}"))
+
+
+@pytest.mark.parametrize("stmt, index", [
+    (_select_sellers_items(5, 0, 0, 0, "2018-01-01", "2019-01-01", None), "ix_seller_items_item_date"),
+    (_select_sellers_items(0, 0, 7, 0, "", "", None), "ix_seller_items_seller_date"),
+    (_select_sellers_items(0, 0, 0, 3, "2018-01-01", "2019-01-01", None), "ix_seller_items_ea_date"),
+    (_select_sellers_items(0, 0, 0, 0, "2018-01-01", "2019-01-01", None), "ix_seller_items_purchase_date"),
+    (_select_members_items(4, 0, 0, "", "", None), "ix_member_items_item_date"),
+    (_select_members_items(0, 0, 12, "2018-01-01", "2019-01-01", None), "ix_member_items_member_date"),
+    (_select_members_items(0, 0, 0, "2018-01-01", "2019-01-01", None), "ix_member_items_purchase_date"),
+])
+def test_items_list_filters_use_their_index(stmt, index):
+    plan = _query_plan(stmt)
+    assert index in plan
+    # the index also gives the ORDER BY purchase_date DESC
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
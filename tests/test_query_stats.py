@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.db.database import engine
+from app.db.query_stats import query_stats
+
+
+def test_request_statements_are_counted_and_repeats_reported():
+    query_stats.enable()
+    try:
+        request_queries = query_stats.start_request()
+        with engine.connect() as conn:
+            for member_id in range(5):
+                conn.execute(text("SELECT name FROM members WHERE member_id = :member_id"), {"member_id": member_id})
+            conn.execute(text("SELECT count(*) FROM members"))
+    finally:
+        query_stats.disable()
+
+    assert request_queries.count == 6
+    # with the driver's parameter style
+    [(statement, total)] = request_queries.as_dict(threshold=5)["repeated"].items()
+    assert statement.startswith("SELECT name FROM members WHERE member_id = ") and total == 5
+    assert query_stats.start_request() is None
+
+
+def test_failed_statements_dont_keep_their_start_time():
+    query_stats.enable()
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+                conn.rollback()
+            assert not conn.info.get("query_start_time")
+    finally:
+        query_stats.disable()
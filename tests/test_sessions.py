@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import crud_sellers, schemas, get_db
+
+
+def _request(handler):
+    # what FastAPI does for each request with the DB_SESSION dependency
+    sessions = get_db()
+    db = next(sessions)
+    try:
+        return db, handler(db)
+    finally:
+        sessions.close()
+
+
+def test_parallel_requests_have_their_own_session(db):
+    def _work(i: int):
+        if i % 2:
+            return _request(lambda _db: crud_sellers.create_seller(_db, schemas.SellerCreate(
+                name=f"Seller {i:04d}", tlf="912345670", email="seller@cdc.pt"
+            )).seller_id)
+        return _request(lambda _db: len(crud_sellers.get_sellers_list(_db)))
+
+    with ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(_work, range(200)))
+
+    sessions = [session for session, _ in results]
+    assert len(set(map(id, sessions))) > 1
+    assert all(not session.identity_map for session in sessions)
+
+    seller_ids = [seller_id for i, (_, seller_id) in enumerate(results) if i % 2]
+    assert len(set(seller_ids)) == 100
+    assert len(crud_sellers.get_sellers_list(db)) == 100
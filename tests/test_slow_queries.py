@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.db.database import engine
+from app.db.slow_queries import slow_query_log, _explain
+
+
+def test_failed_statements_dont_keep_their_start_time():
+    threshold_ms = slow_query_log.threshold_ms
+    slow_query_log.set_threshold(10_000)
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+                conn.rollback()
+            assert not conn.info.get("slow_query_start_time")
+    finally:
+        slow_query_log.set_threshold(threshold_ms)
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="only PostgreSQL aborts the transaction")
+def test_failed_explain_keeps_the_transaction():
+    with engine.connect() as conn:
+        conn.execute(select(1))
+        assert _explain(conn, "SELECT * FROM no_such_table", {}).startswith("EXPLAIN failed")
+        assert conn.execute(select(1)).scalar() == 1